@@ -0,0 +1,66 @@
+"""Add table versions bumped by triggers
+
+Revision ID: 4c0def0a3c45
+Revises: 6c92c960e61f
+Create Date: 2026-10-18 14:21:09.402715
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c0def0a3c45'
+down_revision = '6c92c960e61f'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = (
+    'grades',
+    'subjects',
+    'gradesubjects',
+    'schoolyears',
+    'nationalities',
+    'students',
+    'registrations',
+)
+
+
+def upgrade():
+    op.create_table('tableversions',
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('modified_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    op.execute("""
+        CREATE FUNCTION bump_table_version() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO tableversions (table_name, version, modified_at)
+            VALUES (TG_TABLE_NAME, 1, now())
+            ON CONFLICT (table_name) DO UPDATE
+            SET version = tableversions.version + 1,
+                modified_at = excluded.modified_at;
+            RETURN NULL;
+        END
+        $$
+    """)
+    for table in VERSIONED_TABLES:
+        # Once per statement, not per row, so bulk writes bump it once.
+        op.execute(f"""
+            CREATE TRIGGER {table}_bump_table_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+        """)
+        op.execute(f"""
+            INSERT INTO tableversions (table_name, version, modified_at)
+            VALUES ('{table}', 1, now())
+        """)
+
+
+def downgrade():
+    for table in VERSIONED_TABLES:
+        op.execute(f'DROP TRIGGER {table}_bump_table_version ON {table}')
+    op.execute('DROP FUNCTION bump_table_version()')
+    op.drop_table('tableversions')
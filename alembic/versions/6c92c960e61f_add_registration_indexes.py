@@ -0,0 +1,76 @@
+"""Add indexes and unique student per school year on registrations
+
+Revision ID: 6c92c960e61f
+Revises: cc8a86918726
+Create Date: 2026-10-18 11:02:17.530118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c92c960e61f'
+down_revision = 'cc8a86918726'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block, so the
+    # indexes are built in autocommit mode without blocking writes. A failed
+    # build leaves an INVALID index behind, drop it before re-running.
+    with op.get_context().autocommit_block():
+        # /registrations filters, keyset pages and promotion scans, the
+        # included columns make the promotion plan index-only.
+        op.create_index(
+            'ix_registrations_school_year_id_grade_id_id', 'registrations',
+            ['school_year_id', 'grade_id', 'id'],
+            postgresql_include=['student_id', 'regi_no'],
+            postgresql_concurrently=True
+        )
+        # Grade filters and the grade delete guard.
+        op.create_index(
+            'ix_registrations_grade_id', 'registrations', ['grade_id'],
+            postgresql_concurrently=True
+        )
+        # Foreign key checks when a registration is deleted.
+        op.create_index(
+            'ix_registrations_old_registration_id', 'registrations',
+            ['old_registration_id'],
+            postgresql_where=sa.text('old_registration_id IS NOT NULL'),
+            postgresql_concurrently=True
+        )
+        # One registration per student and school year, also serves lookups
+        # by student.
+        op.create_index(
+            'uq_registrations_student_id_school_year_id', 'registrations',
+            ['student_id', 'school_year_id'], unique=True,
+            postgresql_concurrently=True
+        )
+
+    op.execute(
+        'ALTER TABLE registrations '
+        'ADD CONSTRAINT uq_registrations_student_id_school_year_id '
+        'UNIQUE USING INDEX uq_registrations_student_id_school_year_id'
+    )
+
+
+def downgrade():
+    op.drop_constraint(
+        'uq_registrations_student_id_school_year_id', 'registrations',
+        type_='unique'
+    )
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_registrations_old_registration_id', table_name='registrations',
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_registrations_grade_id', table_name='registrations',
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_registrations_school_year_id_grade_id_id',
+            table_name='registrations', postgresql_concurrently=True
+        )
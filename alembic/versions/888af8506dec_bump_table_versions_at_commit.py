@@ -0,0 +1,101 @@
+"""Bump table versions at commit, never backwards
+
+Revision ID: 888af8506dec
+Revises: e3a8c51b7f29
+Create Date: 2026-10-18 21:04:12.583190
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '888af8506dec'
+down_revision = 'e3a8c51b7f29'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = (
+    'grades',
+    'subjects',
+    'gradesubjects',
+    'schoolyears',
+    'nationalities',
+    'students',
+    'registrations',
+)
+
+
+def upgrade():
+    # now() is the transaction's start: a long transaction committing
+    # after a short one moved modified_at, and Last-Modified, backwards.
+    # The deferred row triggers below fire once per written row at commit,
+    # the setting makes all but the first of each transaction return early.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_LEVEL = 'ROW' THEN
+                IF current_setting(
+                    'sms_version_bumped.' || TG_TABLE_NAME, true
+                ) = 'on' THEN
+                    RETURN NULL;
+                END IF;
+                PERFORM set_config(
+                    'sms_version_bumped.' || TG_TABLE_NAME, 'on', true
+                );
+            END IF;
+            INSERT INTO tableversions (table_name, version, modified_at)
+            VALUES (TG_TABLE_NAME, 1, clock_timestamp())
+            ON CONFLICT (table_name) DO UPDATE
+            SET version = tableversions.version + 1,
+                modified_at = GREATEST(
+                    tableversions.modified_at, excluded.modified_at
+                );
+            RETURN NULL;
+        END
+        $$
+    """)
+    for table in VERSIONED_TABLES:
+        # The statement trigger locked the table's version row from the
+        # write until commit, so every writer of the table waited for the
+        # slowest open transaction, e.g. a whole student import. Bumped at
+        # commit, the row is only locked for the end of the commit.
+        op.execute(f'DROP TRIGGER {table}_bump_table_version ON {table}')
+        op.execute(f"""
+            CREATE CONSTRAINT TRIGGER {table}_bump_table_version
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            DEFERRABLE INITIALLY DEFERRED
+            FOR EACH ROW EXECUTE FUNCTION bump_table_version()
+        """)
+        # TRUNCATE locks the whole table until commit anyway.
+        op.execute(f"""
+            CREATE TRIGGER {table}_bump_table_version_truncate
+            AFTER TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+        """)
+
+
+def downgrade():
+    for table in VERSIONED_TABLES:
+        op.execute(
+            f'DROP TRIGGER {table}_bump_table_version_truncate ON {table}'
+        )
+        op.execute(f'DROP TRIGGER {table}_bump_table_version ON {table}')
+        op.execute(f"""
+            CREATE TRIGGER {table}_bump_table_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+        """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO tableversions (table_name, version, modified_at)
+            VALUES (TG_TABLE_NAME, 1, now())
+            ON CONFLICT (table_name) DO UPDATE
+            SET version = tableversions.version + 1,
+                modified_at = excluded.modified_at;
+            RETURN NULL;
+        END
+        $$
+    """)
@@ -0,0 +1,62 @@
+"""Add normalized trigram index on student names
+
+Revision ID: 9b1e4f7c2d60
+Revises: 4c0def0a3c45
+Create Date: 2026-10-18 17:36:52.118604
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9b1e4f7c2d60'
+down_revision = '4c0def0a3c45'
+branch_labels = None
+depends_on = None
+
+# Same folding as app.core.arabic.normalize_arabic: alef and hamza variants,
+# ta marbuta and alef maqsura are mapped, diacritics and tatweel dropped
+# (translate() deletes the characters with no counterpart).
+FOLDED_FROM = 'آأإٱةىؤئ'
+FOLDED_TO = 'ااااهيوي'
+REMOVED_MARKS = ''.join(chr(code) for code in range(0x064B, 0x0653)) + (
+    'ٰـ'
+)
+
+# The search query must use this exact expression to hit the index.
+FULL_NAME = (
+    "normalize_arabic(first_name || ' ' || father_name || ' ' || "
+    "gfather_name || ' ' || last_name)"
+)
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute(f"""
+        CREATE FUNCTION normalize_arabic(value text) RETURNS text
+        LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE AS $$
+            SELECT btrim(regexp_replace(
+                translate(
+                    lower(value),
+                    '{FOLDED_FROM}{REMOVED_MARKS}',
+                    '{FOLDED_TO}'
+                ),
+                '\\s+', ' ', 'g'
+            ))
+        $$
+    """)
+    # Built without blocking writes, see 6c92c960e61f.
+    with op.get_context().autocommit_block():
+        op.execute(
+            'CREATE INDEX CONCURRENTLY ix_students_full_name_trgm '
+            f'ON students USING gin ({FULL_NAME} gin_trgm_ops)'
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_students_full_name_trgm', table_name='students',
+            postgresql_concurrently=True
+        )
+    op.execute('DROP FUNCTION normalize_arabic(text)')
@@ -0,0 +1,54 @@
+"""Add indexes for the student list sort orders and prefix filters
+
+Revision ID: b7d2e94a1c35
+Revises: 888af8506dec
+Create Date: 2026-10-18 22:41:05.204117
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2e94a1c35'
+down_revision = '888af8506dec'
+branch_labels = None
+depends_on = None
+
+# Columns /students can be sorted by, besides the primary key. With the id
+# as the tie breaker, each index serves both directions of order_by and
+# seeks the keyset cursor (value, id) instead of sorting the whole table.
+SORT_COLUMNS = ('first_name', 'last_name', 'date_of_birth')
+# Columns with a `prefix` filter, compiled to LIKE 'value%'. The sort
+# indexes above follow the database collation, which LIKE can't seek
+# through unless it is C: these compare characters byte by byte instead.
+PREFIX_COLUMNS = ('first_name', 'last_name')
+
+
+def upgrade():
+    # Built without blocking writes, see 6c92c960e61f.
+    with op.get_context().autocommit_block():
+        for column in SORT_COLUMNS:
+            op.create_index(
+                f'ix_students_{column}_id', 'students', [column, 'id'],
+                postgresql_concurrently=True
+            )
+        for column in PREFIX_COLUMNS:
+            op.create_index(
+                f'ix_students_{column}_pattern', 'students', [column],
+                postgresql_ops={column: 'text_pattern_ops'},
+                postgresql_concurrently=True
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for column in reversed(PREFIX_COLUMNS):
+            op.drop_index(
+                f'ix_students_{column}_pattern', table_name='students',
+                postgresql_concurrently=True
+            )
+        for column in reversed(SORT_COLUMNS):
+            op.drop_index(
+                f'ix_students_{column}_id', table_name='students',
+                postgresql_concurrently=True
+            )
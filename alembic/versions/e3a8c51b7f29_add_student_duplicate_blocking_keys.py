@@ -0,0 +1,50 @@
+"""Add blocking keys for duplicate student detection
+
+Revision ID: e3a8c51b7f29
+Revises: 9b1e4f7c2d60
+Create Date: 2026-10-18 18:52:40.264117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a8c51b7f29'
+down_revision = '9b1e4f7c2d60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Adding a stored generated column rewrites the table once.
+    op.add_column('students', sa.Column(
+        'name_block_key', sa.String(),
+        sa.Computed("normalize_arabic(first_name || ' ' || last_name)"),
+        nullable=False
+    ))
+    # Built without blocking writes, see 6c92c960e61f.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_students_date_of_birth_name_block_key', 'students',
+            ['date_of_birth', 'name_block_key'],
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_students_date_of_birth_guardian_phone_no', 'students',
+            ['date_of_birth', 'guardian_phone_no'],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_students_date_of_birth_guardian_phone_no',
+            table_name='students', postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_students_date_of_birth_name_block_key',
+            table_name='students', postgresql_concurrently=True
+        )
+    op.drop_column('students', 'name_block_key')
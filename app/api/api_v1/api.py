@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from app.api.api_v1.routes import (
+    admin,
     grade,
     registration,
     subject,
@@ -15,4 +16,5 @@ api_router.include_router(subject.router)
 api_router.include_router(school_year.router)
 api_router.include_router(student.router)
 api_router.include_router(registration.router)
-api_router.include_router(nationality.router)
\ No newline at end of file
+api_router.include_router(nationality.router)
+api_router.include_router(admin.router)
\ No newline at end of file
@@ -0,0 +1,37 @@
+from typing import List
+from fastapi import APIRouter
+from app import schemas
+from app.api.response_cache import response_cache
+from app.core.instrumentation import TimedRoute
+from app.core.slow_queries import statement_stats
+from app.db.pool import pool_status
+from app.db.session import ReplicaSessionLocals, async_engine, engine
+router = APIRouter(
+    prefix='/admin', tags=['Admin'], route_class=TimedRoute
+)
+
+
+@router.get('/pool', response_model=List[schemas.PoolStatus])
+def get_pool_status():
+    engines = [('primary', engine), ('primary_async', async_engine.sync_engine)]
+    engines += [
+        (f'replica_{index}', factory.kw['bind'].sync_engine)
+        for index, factory in enumerate(ReplicaSessionLocals)
+    ]
+    return [
+        {'name': name, **pool_status(bind.pool)} for name, bind in engines
+    ]
+
+
+@router.get('/queries', response_model=List[schemas.QueryStat])
+def get_top_queries(limit: int = 10):
+    """
+    Statements with the highest total execution time since startup, in
+    this worker process.
+    """
+    return statement_stats.top(limit)
+
+
+@router.get('/response-cache', response_model=schemas.ResponseCacheStats)
+def get_response_cache_stats():
+    return response_cache.stats()
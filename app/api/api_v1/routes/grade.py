@@ -8,41 +8,93 @@ from fastapi import (
     status,
 )
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
+from app.api.conditional import ConditionalGet
+from app.api.deps import (
+    CommonQueryParams,
+    get_async_db,
+    get_db,
+    rows_response,
+)
+from app.api.response_cache import CachedRoute, cache_response
+from app.db.base import Grade, GradeSubject, Subject
+from app.core.config import settings
 from app import (
     crud,
     schemas,
 )
 
-router = APIRouter(prefix='/grades', tags=['Grades'])
+router = APIRouter(
+    prefix='/grades', tags=['Grades'], route_class=CachedRoute
+)
+conditional_get = Depends(ConditionalGet(Grade))
+grade_subjects_conditional_get = Depends(
+    ConditionalGet(Grade, GradeSubject, Subject)
+)
 
 
-@router.get('', response_model=List[schemas.GradeInDB])
-def get_grades(
+@router.get(
+    '', response_model=List[schemas.GradeInDB],
+    dependencies=[conditional_get]
+)
+@cache_response(Grade)
+async def get_grades(
     *,
-    db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 20
+    db: AsyncSession = Depends(get_async_db),
+    commons: CommonQueryParams = Depends(),
+    response: Response,
 ):
     """
     Retrieve all grades.
     """
-    grades = crud.grade.get_multi(db, skip=skip, limit=limit)
+    if settings.LIST_RENDER_MODE != 'orm':
+        grades = await crud.grade.get_multi_rows_async(
+            db, schemas.GradeInDB,
+            skip=commons.skip, limit=commons.limit, after=commons.after,
+            total=commons.total
+        )
+        commons.set_next_cursor(response, grades)
+        return rows_response(response, grades)
+
+    grades = await crud.grade.get_multi_async(
+        db, skip=commons.skip, limit=commons.limit, after=commons.after,
+        total=commons.total
+    )
+    commons.set_next_cursor(response, grades)
     return grades
 
 
-@router.get('/{grade_id}', response_model=schemas.GradeInDB)
-def get_grade(
+@router.get(
+    '/subjects/matrix', response_model=schemas.GradeSubjectMatrix,
+    dependencies=[grade_subjects_conditional_get]
+)
+@cache_response(Grade, GradeSubject, Subject)
+async def get_grade_subject_matrix(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    The subjects assigned to every grade at once, as lists of subject ids.
+    """
+    return await crud.grade.get_subject_matrix_async(db)
+
+
+@router.get(
+    '/{grade_id}', response_model=schemas.GradeInDB,
+    dependencies=[conditional_get]
+)
+@cache_response(Grade, by_id='grade_id')
+async def get_grade(
+    *,
+    db: AsyncSession = Depends(get_async_db),
     grade_id: int,
 ):
     """
     Retrieve one grade based on id key.
     """
-    grade = crud.grade.get(db, id=grade_id)
+    grade = await crud.grade.get_async(db, id=grade_id)
 
     if not grade:
         raise HTTPException(
@@ -82,14 +134,13 @@ def update_grade(
     """
     Update a grade.
     """
-    grade = crud.grade.get(db, id=grade_id)
+    grade = crud.grade.update_by_id(db, id=grade_id, obj_in=grade_in)
 
     if not grade:
         raise HTTPException(
             status_code=404, detail=f"Grade with id {grade_id} does not exist",
         )
 
-    grade = crud.grade.update(db, db_obj=grade, obj_in=grade_in)
     return grade
 
 
@@ -102,25 +153,27 @@ def delete_grade(
     """
     Delete a grade.
     """
-    grade = crud.grade.get(db, id=grade_id)
-
-    if not grade:
-        raise HTTPException(
-            status_code=404,
-            detail=f"لايوجد صف بـ هذا الرقم {grade_id}.",
-        )
-    if grade.subjects:
+    dependents = crud.grade.has_dependents(db, id=grade_id)
+
+    if any(dependents.values()):
+        # Only read the grade when its name is needed for the message.
+        grade = crud.grade.get(db, id=grade_id)
+        if dependents['subjects']:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"لايمكن حذف {grade.name} لانه يوجد مواد مرتبطة بالصف, يجب إلغاء تعيين جميع المواد المرتبطة بالصف ثم حاول مرة اخرى",
+            )
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
-            detail=f"لايمكن حذف {grade.name} لانه يوجد مواد مرتبطة بالصف, يجب إلغاء تعيين جميع المواد المرتبطة بالصف ثم حاول مرة اخرى",
+            detail=f"لايمكن حذف {grade.name} ,لانه توجد بيانات طلاب مرتبطة بـ هذا الصف, يجب اولاً حذف بيانات الطلاب المرتبطة بـ هذا الصف ثم حاول مرة اخرى.",
         )
-    if grade.students:
+
+    if not crud.grade.remove_by_id(db, id=grade_id):
         raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=f"لايمكن حذف {grade.name} ,لانه توجد بيانات طلاب مرتبطة بـ هذا الصف, يجب اولاً حذف بيانات الطلاب المرتبطة بـ هذا الصف ثم حاول مرة اخرى.",
+            status_code=404,
+            detail=f"لايوجد صف بـ هذا الرقم {grade_id}.",
         )
 
-    grade = crud.grade.remove(db, id=grade_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -159,20 +212,26 @@ def assign_subject_to_grade(
     }
 
 
-@router.get('/{grade_id}/subjects', response_model=schemas.GradeSubjectsOut)
-def get_assigned_or_not_assigned_grade_subjects(
+@router.get(
+    '/{grade_id}/subjects', response_model=schemas.GradeSubjectsOut,
+    dependencies=[grade_subjects_conditional_get]
+)
+@cache_response(
+    Grade, GradeSubject, Subject, by_id='grade_id'
+)
+async def get_assigned_or_not_assigned_grade_subjects(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     grade_id: int,
     assigned: bool = True
 ):
-    grade = crud.grade.get(db, grade_id)
+    grade = await crud.grade.get_async(db, grade_id)
     if not grade:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Grade with id {grade_id} does not exist",
         )
-    subjects = crud.grade.get_grade_assigned_or_not_assigned_subjects(
+    subjects = await crud.grade.get_grade_assigned_or_not_assigned_subjects_async(
         db, grade_id=grade_id, assigned=assigned
     )
     return {
@@ -8,39 +8,70 @@ from fastapi import (
     status,
 )
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.api.conditional import ConditionalGet
 from app.api import deps
+from app.api.response_cache import CachedRoute, cache_response
+from app.db.base import Nationality
+from app.core.config import settings
 from app import (
     crud,
     schemas,
 )
 
-router = APIRouter(prefix='/nationalities', tags=['Nationalities'])
+router = APIRouter(
+    prefix='/nationalities', tags=['Nationalities'], route_class=CachedRoute
+)
+conditional_get = Depends(ConditionalGet(Nationality))
 
 
-@router.get('', response_model=List[schemas.NationalityInDB])
-def get_nationalities(
+@router.get(
+    '', response_model=List[schemas.NationalityInDB],
+    dependencies=[conditional_get]
+)
+@cache_response(Nationality)
+async def get_nationalities(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     commons: deps.CommonQueryParams = Depends(),
+    response: Response,
 ):
     """
     Retrieve nationalities.
     """
-    return crud.nationality.get_multi(db, skip=commons.skip, limit=commons.limit)
+    if settings.LIST_RENDER_MODE != 'orm':
+        nationalities = await crud.nationality.get_multi_rows_async(
+            db, schemas.NationalityInDB,
+            skip=commons.skip, limit=commons.limit, after=commons.after,
+            total=commons.total
+        )
+        commons.set_next_cursor(response, nationalities)
+        return deps.rows_response(response, nationalities)
+
+    nationalities = await crud.nationality.get_multi_async(
+        db, skip=commons.skip, limit=commons.limit, after=commons.after,
+        total=commons.total
+    )
+    commons.set_next_cursor(response, nationalities)
+    return nationalities
 
 
-@router.get('/{nationality_id}', response_model=schemas.NationalityInDB)
-def get_nationality(
+@router.get(
+    '/{nationality_id}', response_model=schemas.NationalityInDB,
+    dependencies=[conditional_get]
+)
+@cache_response(Nationality, by_id='nationality_id')
+async def get_nationality(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     nationality_id: int
 ):
     """
     Get nationality by id.
     """
-    nationality = crud.nationality.get(db, nationality_id)
+    nationality = await crud.nationality.get_async(db, nationality_id)
 
     if not nationality:
         raise HTTPException(status_code=404, detail="Nationality not found")
@@ -79,11 +110,6 @@ def update_nationality(
     """
     Update a nationality.
     """
-    nationality = crud.nationality.get(db, nationality_id)
-
-    if not nationality:
-        raise HTTPException(status_code=404, detail="Nationality not found")
-
     nationality = crud.nationality.get_by_name(
         db, nationality_in.masculine_form, nationality_in.feminine_form
     )
@@ -92,8 +118,11 @@ def update_nationality(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"Redundant data."
         )
-    nationality = crud.nationality.update(
-        db, db_obj=nationality, obj_in=nationality_in)
+    nationality = crud.nationality.update_by_id(
+        db, id=nationality_id, obj_in=nationality_in)
+
+    if not nationality:
+        raise HTTPException(status_code=404, detail="Nationality not found")
 
     return nationality
 
@@ -107,17 +136,13 @@ def delete_nationality(
     """
     Delete a nationality.
     """
-    nationality = crud.nationality.get(db, nationality_id)
-
-    if not nationality:
-        raise HTTPException(status_code=404, detail="Nationality not found")
-
-    if nationality.students:
+    if crud.nationality.has_dependents(db, id=nationality_id)['students']:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="There are students data depends on this nationality."
         )
 
-    crud.nationality.remove(db, id=nationality_id)
+    if not crud.nationality.remove_by_id(db, id=nationality_id):
+        raise HTTPException(status_code=404, detail="Nationality not found")
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
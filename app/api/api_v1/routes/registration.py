@@ -10,20 +10,50 @@ from fastapi import (
     status,
 )
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.api.deps import CommonQueryParams, get_db
+from app.api.conditional import ConditionalGet
+from app.api.deps import (
+    CommonQueryParams,
+    get_async_db,
+    get_db,
+    json_response,
+    rows_response,
+)
+from app.api.export import export_response
+from app.api.response_cache import CachedRoute, cache_response
+from app.db.base import (
+    Grade,
+    Nationality,
+    Registration,
+    SchoolYear,
+    Student,
+)
+from app.core.config import settings
 from app import (
     crud,
     schemas,
 )
-router = APIRouter(prefix='/registrations', tags=['Registrations'])
+router = APIRouter(
+    prefix='/registrations', tags=['Registrations'], route_class=CachedRoute
+)
+conditional_get = Depends(ConditionalGet(
+    Registration, Student, Nationality, Grade, SchoolYear
+))
 
 
-@router.get('', response_model=List[schemas.RegistrationOut])
-def get_registrations(
+@router.get(
+    '', response_model=List[schemas.RegistrationOut],
+    dependencies=[conditional_get]
+)
+@cache_response(
+    Registration, Student, Nationality, Grade, SchoolYear
+)
+async def get_registrations(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     commons: CommonQueryParams = Depends(),
+    response: Response,
     school_year_id: Optional[int] = None,
     grade_id: Optional[int] = None,
     regi_no: Optional[str] = None,
@@ -31,19 +61,68 @@ def get_registrations(
     params = dict(grade_id=grade_id,
                   school_year_id=school_year_id, regi_no=regi_no)
 
-    return crud.registeration.get_multi(
-        db, skip=commons.skip,
-        limit=commons.limit, params=params
+    if settings.LIST_RENDER_MODE == 'database':
+        body, count, last_id, _ = await crud.registeration.get_multi_json_async(
+            db, schemas.RegistrationOut,
+            skip=commons.skip, limit=commons.limit, params=params,
+            after=commons.after, total=commons.total
+        )
+        commons.set_next_cursor_id(response, count, last_id)
+        return json_response(response, body)
+
+    if settings.LIST_RENDER_MODE == 'rows':
+        registrations = await crud.registeration.get_multi_rows_async(
+            db, schemas.RegistrationOut,
+            skip=commons.skip, limit=commons.limit, params=params,
+            after=commons.after, total=commons.total
+        )
+        commons.set_next_cursor(response, registrations)
+        return rows_response(response, registrations)
+
+    registrations = await crud.registeration.get_multi_async(
+        db, skip=commons.skip, limit=commons.limit,
+        params=params, after=commons.after, total=commons.total
     )
+    commons.set_next_cursor(response, registrations)
+    return registrations
 
 
-@router.get('/{registration_id}', response_model=schemas.RegistrationOut)
-def get_registration(
+@router.get('/export')
+async def export_registrations(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    format: schemas.ExportFormat = schemas.ExportFormat.ndjson,
+    school_year_id: Optional[int] = None,
+    grade_id: Optional[int] = None,
+    regi_no: Optional[str] = None,
+):
+    """
+    Stream the registrations matching the list filters as NDJSON or CSV.
+    """
+    params = dict(grade_id=grade_id,
+                  school_year_id=school_year_id, regi_no=regi_no)
+    return export_response(
+        crud.registeration.stream_rows_async(
+            db, schemas.RegistrationOut, params=params
+        ),
+        format, 'registrations'
+    )
+
+
+@router.get(
+    '/{registration_id}', response_model=schemas.RegistrationOut,
+    dependencies=[conditional_get]
+)
+@cache_response(
+    Registration, Student, Nationality, Grade, SchoolYear,
+    by_id='registration_id'
+)
+async def get_registration(
+    *,
+    db: AsyncSession = Depends(get_async_db),
     registration_id: int
 ):
-    registration = crud.registeration.get(db, registration_id)
+    registration = await crud.registeration.get_async(db, registration_id)
 
     if not registration:
         raise HTTPException(
@@ -94,14 +173,69 @@ def create_registration(
             detail=f"Cannot register student in two classes on the same year."
         )
 
-    # Generate a unique registration number
-    regi_no = crud.registeration.generate_unique_regi_no(
-        db, school_year, grade)
+    # The check above can race a concurrent enrollment of the same student,
+    # which the insert then skips.
+    registration = crud.registeration.register(
+        db, student_id=student.id, grade=grade, school_year=school_year
+    )
+    if registration is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Cannot register student in two classes on the same year."
+        )
+    return registration
+
+
+@router.post('/bulk', response_model=List[schemas.RegistrationBulkResult])
+def create_registrations_bulk(
+    *,
+    db: Session = Depends(get_db),
+    registrations_in: List[schemas.RegistrationIn]
+):
+    school_year = crud.school_year.get_current_school_year(db)
+
+    if not school_year:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"School year not set yet! Please go to settings and set it."
+        )
 
-    registration_data = schemas.RegistrationCreate(
-        regi_no=regi_no, student_id=student.id,
-        grade_id=grade.id, school_year_id=school_year.id
+    return crud.registeration.create_bulk(
+        db, school_year=school_year, registrations_in=registrations_in
     )
 
-    registration = crud.registeration.create(db, obj_in=registration_data)
-    return registration
+
+@router.post('/promote', response_model=schemas.PromotionOut)
+def promote_students(
+    *,
+    db: Session = Depends(get_db),
+    promotion_in: schemas.PromotionIn
+):
+    from_school_year = crud.school_year.get(
+        db, promotion_in.from_school_year_id)
+
+    if not from_school_year:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"School year with id {promotion_in.from_school_year_id} does not exist."
+        )
+
+    to_school_year = crud.school_year.get(db, promotion_in.to_school_year_id)
+
+    if not to_school_year:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"School year with id {promotion_in.to_school_year_id} does not exist."
+        )
+
+    counts = crud.registeration.promote(
+        db,
+        from_school_year=from_school_year,
+        to_school_year=to_school_year,
+        overrides={
+            override.student_id: override.action
+            for override in promotion_in.overrides
+        },
+        dry_run=promotion_in.dry_run
+    )
+    return {**counts, 'dry_run': promotion_in.dry_run}
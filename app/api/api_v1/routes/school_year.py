@@ -8,41 +8,75 @@ from fastapi import (
     status,
 )
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
+from app.api.conditional import ConditionalGet
+from app.api.deps import (
+    CommonQueryParams,
+    get_async_db,
+    get_db,
+    rows_response,
+)
+from app.api.response_cache import CachedRoute, cache_response
+from app.db.base import SchoolYear
+from app.core.config import settings
 from app import (
     crud,
     schemas,
 )
 from app.schemas.school_year import SchoolYearInDB
-router = APIRouter(prefix='/school-years', tags=['School Years'])
+router = APIRouter(
+    prefix='/school-years', tags=['School Years'], route_class=CachedRoute
+)
+conditional_get = Depends(ConditionalGet(SchoolYear))
 
 
-@router.get('', response_model=List[schemas.SchoolYearInDB])
-def get_school_years(
+@router.get(
+    '', response_model=List[schemas.SchoolYearInDB],
+    dependencies=[conditional_get]
+)
+@cache_response(SchoolYear)
+async def get_school_years(
     *,
-    db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 20
+    db: AsyncSession = Depends(get_async_db),
+    commons: CommonQueryParams = Depends(),
+    response: Response,
 ):
     """
     Retrieve all school years.
     """
-    school_years = crud.school_year.get_multi(db, skip=skip, limit=limit)
+    if settings.LIST_RENDER_MODE != 'orm':
+        school_years = await crud.school_year.get_multi_rows_async(
+            db, schemas.SchoolYearInDB,
+            skip=commons.skip, limit=commons.limit, after=commons.after,
+            total=commons.total
+        )
+        commons.set_next_cursor(response, school_years)
+        return rows_response(response, school_years)
+
+    school_years = await crud.school_year.get_multi_async(
+        db, skip=commons.skip, limit=commons.limit, after=commons.after,
+        total=commons.total
+    )
+    commons.set_next_cursor(response, school_years)
     return school_years
 
 
-@router.get('/{school_year_id}', response_model=schemas.SchoolYearInDB)
-def get_school_year(
+@router.get(
+    '/{school_year_id}', response_model=schemas.SchoolYearInDB,
+    dependencies=[conditional_get]
+)
+@cache_response(SchoolYear, by_id='school_year_id')
+async def get_school_year(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     school_year_id: int,
 ):
     """
     Retrieve one school year based on id key.
     """
-    school_year = crud.school_year.get(db, id=school_year_id)
+    school_year = await crud.school_year.get_async(db, id=school_year_id)
 
     if not school_year:
         raise HTTPException(
@@ -81,15 +115,14 @@ def update_school_year(
     """
     Update a school year.
     """
-    school_year = crud.school_year.get(db, id=school_year_id)
+    school_year = crud.school_year.update_by_id(
+        db, id=school_year_id, obj_in=school_year_in)
 
     if not school_year:
         raise HTTPException(
             status_code=404, detail=f"School year with id {school_year_id} does not exist",
         )
 
-    school_year = crud.school_year.update(
-        db, db_obj=school_year, obj_in=school_year_in)
     return school_year
 
 
@@ -123,17 +156,17 @@ def delete_school_year(
     """
     Delete a school year.
     """
-    school_year = crud.school_year.get(db, id=school_year_id)
-
-    if not school_year:
-        raise HTTPException(
-            status_code=404, detail=f"School year with id {school_year_id} does not exist",
-        )
-    if school_year.students:
+    if crud.school_year.has_dependents(db, id=school_year_id)['students']:
+        # Only read the school year when its title is needed for the message.
+        school_year = crud.school_year.get(db, id=school_year_id)
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"لايمكن حذف هذا العالم الدراسي {school_year.title} لانه توجد بيانات طلاب مرتبطة به, يجب حذف بيانات الطلاب اولاُ ثم حاول مرة اخرى.",
         )
 
-    school_year = crud.school_year.remove(db, id=school_year_id)
+    if not crud.school_year.remove_by_id(db, id=school_year_id):
+        raise HTTPException(
+            status_code=404, detail=f"School year with id {school_year_id} does not exist",
+        )
+
     return Response(status_code=status.HTTP_204_NO_CONTENT)
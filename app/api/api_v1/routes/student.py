@@ -1,37 +1,164 @@
-from typing import List
+from typing import List, Optional
 from fastapi import (
     APIRouter,
     Depends,
+    File,
     HTTPException,
+    Query,
     Response,
+    UploadFile,
     status,
 )
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.api.deps import CommonQueryParams, get_db
+from app.api.conditional import ConditionalGet
+from app.api.deps import (
+    CommonQueryParams,
+    FilterParams,
+    get_async_db,
+    get_db,
+    json_response,
+    rows_response,
+)
+from app.api.export import export_response
+from app.api.response_cache import CachedRoute, cache_response
+from app.api.upload import read_upload
+from app.core.arabic import normalize_arabic
+from app.crud.filters import Filters
+from app.db.base import Nationality, Student
+from app.core.config import settings
 from app import (
     crud,
     schemas,
 )
-router = APIRouter(prefix='/students', tags=['Students'])
+router = APIRouter(
+    prefix='/students', tags=['Students'], route_class=CachedRoute
+)
+conditional_get = Depends(ConditionalGet(Student, Nationality))
 
 
-@router.get('', response_model=List[schemas.StudentInDB])
-def get_students(
+@router.get(
+    '', response_model=List[schemas.StudentInDB],
+    dependencies=[conditional_get]
+)
+@cache_response(Student, Nationality)
+async def get_students(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     commons: CommonQueryParams = Depends(),
+    filters: Filters = Depends(FilterParams(crud.student.filter_spec)),
+    response: Response,
 ):
-    return crud.student.get_multi(db, skip=commons.skip, limit=commons.limit)
+    """
+    Filter with `nationality_id`, `nationality_id__in`, `gender`,
+    `date_of_birth`, `date_of_birth__gte`, `date_of_birth__lte`, and
+    `first_name`, `last_name` or their `__prefix` variants. Sort with
+    `order_by`, prefixed with `-` for descending order. List the fields to
+    return in `fields`, comma-separated; `id` is always returned.
+    """
+    schema = filters.schema(schemas.StudentInDB)
+    if settings.LIST_RENDER_MODE == 'database':
+        body, count, last_id, last_key = (
+            await crud.student.get_multi_json_async(
+                db, schema,
+                skip=commons.skip, limit=commons.limit, after=commons.after,
+                filters=filters, total=commons.total
+            )
+        )
+        commons.set_next_cursor_id(response, count, last_id, last_key)
+        return json_response(response, body)
+
+    # Sparse fieldsets are only selected through the row projection.
+    if settings.LIST_RENDER_MODE == 'rows' or filters.fields:
+        students = await crud.student.get_multi_rows_async(
+            db, schema,
+            skip=commons.skip, limit=commons.limit, after=commons.after,
+            filters=filters, total=commons.total
+        )
+        commons.set_next_cursor(response, students, filters.order)
+        return rows_response(response, students)
 
+    students = await crud.student.get_multi_async(
+        db, skip=commons.skip, limit=commons.limit, after=commons.after,
+        filters=filters, total=commons.total
+    )
+    commons.set_next_cursor(response, students, filters.order)
+    return students
 
-@router.get('/{student_id}', response_model=schemas.StudentInDB)
-def get_student(
+
+@router.get('/export')
+async def export_students(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    format: schemas.ExportFormat = schemas.ExportFormat.ndjson,
+    filters: Filters = Depends(FilterParams(crud.student.filter_spec)),
+):
+    """
+    Stream the students matching the list filters as NDJSON or CSV, sorted
+    with `order_by` and limited to `fields` like the list.
+    """
+    return export_response(
+        crud.student.stream_rows_async(
+            db, filters.schema(schemas.StudentInDB), filters=filters
+        ),
+        format, 'students'
+    )
+
+
+@router.get(
+    '/search', response_model=List[schemas.StudentInDB],
+    dependencies=[conditional_get]
+)
+@cache_response(Student, Nationality)
+async def search_students(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    q: str,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Find students by any part of their four-part name, ignoring Arabic
+    spelling variants and diacritics, best matches first.
+    """
+    q = normalize_arabic(q)
+    if len(q) < 2:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query must have at least 2 characters."
+        )
+    return await crud.student.search_async(db, q, limit=limit)
+
+
+@router.get(
+    '/duplicates', response_model=List[schemas.StudentDuplicateCluster],
+    dependencies=[Depends(ConditionalGet(Student))]
+)
+@cache_response(Student)
+async def get_student_duplicates(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Scan every student for clusters of likely duplicates: students born
+    the same day with the same normalized name, or with the same guardian
+    phone number and similar first names.
+    """
+    clusters = await crud.student.duplicate_clusters_async(db)
+    return [{'student_ids': ids} for ids in clusters]
+
+
+@router.get(
+    '/{student_id}', response_model=schemas.StudentInDB,
+    dependencies=[conditional_get]
+)
+@cache_response(Student, Nationality, by_id='student_id')
+async def get_student(
+    *,
+    db: AsyncSession = Depends(get_async_db),
     student_id: int,
 ):
-    student = crud.student.get(db, student_id)
+    student = await crud.student.get_async(db, student_id)
 
     if not student:
         raise HTTPException(
@@ -45,17 +172,47 @@ def get_student(
 def create_student(
     *,
     db: Session = Depends(get_db),
-    student_in: schemas.StudentCreate
+    student_in: schemas.StudentCreate,
+    allow_duplicates: bool = False,
 ):
     if not crud.nationality.get(db, student_in.nationality_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Nationality with id {student_in.nationality_id} not found."
         )
+    if not allow_duplicates:
+        duplicate_ids = crud.student.find_duplicates(db, student_in)
+        if duplicate_ids:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=(
+                    "Student may already exist with id "
+                    f"{', '.join(map(str, duplicate_ids))}, "
+                    "set allow_duplicates to create it anyway."
+                )
+            )
     student = crud.student.create(db, obj_in=student_in)
     return student
 
 
+@router.post('/import', response_model=schemas.StudentImportResult)
+def import_students(
+    *,
+    db: Session = Depends(get_db),
+    file: UploadFile = File(...),
+    format: Optional[schemas.ExportFormat] = None,
+    allow_duplicates: bool = False,
+):
+    """
+    Bulk-load students from a CSV or NDJSON file. Rows that fail validation
+    or look like duplicates are skipped and listed in the response; the
+    rest are imported.
+    """
+    return crud.student.import_rows(
+        db, read_upload(file, format), allow_duplicates=allow_duplicates
+    )
+
+
 @router.put('/{student_id}', response_model=schemas.StudentInDB)
 def update_student(
     *,
@@ -63,21 +220,22 @@ def update_student(
     student_id: int,
     student_in: schemas.StudentUpdate
 ):
-    student = crud.student.get(db, student_id)
+    nationality = crud.nationality.get(db, student_in.nationality_id)
 
-    if not student:
+    if not nationality:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Student with id {student_id} does not exist."
+            detail=f"Nationality with id {student_in.nationality_id} not found."
         )
-    if not crud.nationality.get(db, student_in.nationality_id):
+    student = crud.student.update_by_id(db, id=student_id, obj_in=student_in)
+
+    if not student:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Nationality with id {student_in.nationality_id} not found."
+            detail=f"Student with id {student_id} does not exist."
         )
-    student = crud.student.update(db, db_obj=student, obj_in=student_in)
 
-    return student
+    return {**student._mapping, 'nationality': nationality}
 
 
 @router.delete('/{student_id}', status_code=status.HTTP_204_NO_CONTENT)
@@ -86,21 +244,17 @@ def delete_student(
     db: Session = Depends(get_db),
     student_id: int
 ):
-    student = crud.student.get(db, student_id)
-
-    if not student:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Student with id {student_id} does not exist."
-        )
-
-    if student.registrations:
+    if crud.student.has_dependents(db, id=student_id)['registrations']:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"Cannot delete this student because, it has data depends on it."
         )
     # check if student has no marks then delete it
 
-    crud.student.remove(db, id=student_id)
+    if not crud.student.remove_by_id(db, id=student_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Student with id {student_id} does not exist."
+        )
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
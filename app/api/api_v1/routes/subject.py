@@ -8,40 +8,74 @@ from fastapi import (
     status,
 )
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
+from app.api.conditional import ConditionalGet
+from app.api.deps import (
+    CommonQueryParams,
+    get_async_db,
+    get_db,
+    rows_response,
+)
+from app.api.response_cache import CachedRoute, cache_response
+from app.db.base import Subject
+from app.core.config import settings
 from app import (
     crud,
     schemas,
 )
-router = APIRouter(prefix='/subjects', tags=['Subjects'])
+router = APIRouter(
+    prefix='/subjects', tags=['Subjects'], route_class=CachedRoute
+)
+conditional_get = Depends(ConditionalGet(Subject))
 
 
-@router.get('', response_model=List[schemas.SubjectInDB])
-def get_subjects(
+@router.get(
+    '', response_model=List[schemas.SubjectInDB],
+    dependencies=[conditional_get]
+)
+@cache_response(Subject)
+async def get_subjects(
     *,
-    db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 20
+    db: AsyncSession = Depends(get_async_db),
+    commons: CommonQueryParams = Depends(),
+    response: Response,
 ):
     """
     Retrieve all subjects.
     """
-    subjects = crud.subject.get_multi(db, skip=skip, limit=limit)
+    if settings.LIST_RENDER_MODE != 'orm':
+        subjects = await crud.subject.get_multi_rows_async(
+            db, schemas.SubjectInDB,
+            skip=commons.skip, limit=commons.limit, after=commons.after,
+            total=commons.total
+        )
+        commons.set_next_cursor(response, subjects)
+        return rows_response(response, subjects)
+
+    subjects = await crud.subject.get_multi_async(
+        db, skip=commons.skip, limit=commons.limit, after=commons.after,
+        total=commons.total
+    )
+    commons.set_next_cursor(response, subjects)
     return subjects
 
 
-@router.get('/{subject_id}', response_model=schemas.SubjectInDB)
-def get_subject(
+@router.get(
+    '/{subject_id}', response_model=schemas.SubjectInDB,
+    dependencies=[conditional_get]
+)
+@cache_response(Subject, by_id='subject_id')
+async def get_subject(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     subject_id: int,
 ):
     """
     Retrieve one subject based on id key.
     """
-    subject = crud.subject.get(db, id=subject_id)
+    subject = await crud.subject.get_async(db, id=subject_id)
 
     if not subject:
         raise HTTPException(
@@ -81,14 +115,13 @@ def update_subject(
     """
     Update a subject.
     """
-    subject = crud.subject.get(db, id=subject_id)
+    subject = crud.subject.update_by_id(db, id=subject_id, obj_in=subject_in)
 
     if not subject:
         raise HTTPException(
             status_code=404, detail=f"Subject with id {subject_id} does not exist",
         )
 
-    subject = crud.subject.update(db, db_obj=subject, obj_in=subject_in)
     return subject
 
 
@@ -101,12 +134,9 @@ def delete_subject(
     """
     Delete a subject.
     """
-    subject = crud.subject.get(db, id=subject_id)
-
-    if not subject:
+    if not crud.subject.remove_by_id(db, id=subject_id):
         raise HTTPException(
             status_code=404, detail=f"Subject with id {subject_id} does not exist",
         )
 
-    subject = crud.subject.remove(db, id=subject_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,114 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Type
+from fastapi import Depends, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import get_async_db
+from app.crud.cached import observe_table_versions
+from app.db.base import Base, TableVersion
+
+
+class NotModified(Exception):
+    def __init__(self, headers: dict) -> None:
+        self.headers = headers
+
+
+def not_modified_handler(request: Request, exc: NotModified) -> Response:
+    return Response(status_code=304, headers=exc.headers)
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == '*':
+        return True
+    # Weak comparison, as RFC 7232 asks for If-None-Match.
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return any(
+        tag[2:] == etag if tag.startswith('W/') else tag == etag
+        for tag in candidates
+    )
+
+
+class ConditionalGet:
+    """
+    Dependency for GET routes reading `models`: sets a strong ETag and
+    Last-Modified computed from the tables' versions, and answers 304 Not
+    Modified when the client already holds that representation.
+
+    The validator costs one primary key lookup in `tableversions` and never
+    needs the response body.
+    """
+
+    def __init__(self, *models: Type[Base]) -> None:
+        self.tables = sorted(model.__tablename__ for model in models)
+
+    async def __call__(
+        self,
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_async_db),
+    ) -> None:
+        rows = (await db.execute(
+            select(
+                TableVersion.table_name,
+                TableVersion.version,
+                TableVersion.modified_at,
+            ).where(TableVersion.table_name.in_(self.tables))
+        )).all()
+        observe_table_versions({table: version for table, version, _ in rows})
+        if len(rows) != len(self.tables):
+            # A table without its version row can't be validated.
+            return
+        etag = self._etag(request, rows)
+        headers = {'ETag': etag}
+        last_modified = max(
+            (_as_utc(modified_at) for _, _, modified_at in rows), default=None
+        )
+        if last_modified is not None:
+            headers['Last-Modified'] = format_datetime(last_modified, True)
+        response.headers.update(headers)
+
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match is not None:
+            if etag_matches(if_none_match, etag):
+                raise NotModified(headers)
+        elif self._not_modified_since(
+            request.headers.get('if-modified-since'), last_modified
+        ):
+            raise NotModified(headers)
+
+    @staticmethod
+    def _etag(request: Request, versions) -> str:
+        # The same path and normalized query over the same table versions
+        # always renders the same body.
+        query = '&'.join(sorted(
+            f'{key}={value}'
+            for key, value in request.query_params.multi_items()
+        ))
+        versions = ','.join(
+            f'{table}:{version}' for table, version, _ in sorted(versions)
+        )
+        digest = hashlib.sha1(
+            f'{request.url.path}?{query}|{versions}'.encode()
+        ).hexdigest()
+        return f'"{digest}"'
+
+    @staticmethod
+    def _not_modified_since(
+        if_modified_since: Optional[str], last_modified: Optional[datetime]
+    ) -> bool:
+        if not if_modified_since or last_modified is None:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have whole second precision.
+        return last_modified.replace(microsecond=0) <= _as_utc(since)
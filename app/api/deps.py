@@ -1,6 +1,29 @@
-from typing import Generator
+import base64
+import json
+from typing import (
+    Any,
+    AsyncGenerator,
+    Dict,
+    Generator,
+    List,
+    Optional,
+)
+from fastapi import (
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.crud.filters import FilterError, Filters, FilterSpec, Order
+from app.crud.total_count import TotalCount
+from app.db.replicas import PRIMARY_PIN_COOKIE, read_sessionmaker
 from app.db.session import SessionLocal
+from app.schemas import CountMode
 
 
 def get_db() -> Generator:
@@ -11,7 +34,159 @@ def get_db() -> Generator:
         db.close()
 
 
+async def get_async_db(request: Request) -> AsyncGenerator:
+    """
+    Session for read-only routes, bound to a replica when one is configured
+    and caught up, otherwise to the primary.
+    """
+    session_factory = await read_sessionmaker(
+        request.cookies.get(PRIMARY_PIN_COOKIE)
+    )
+    async with session_factory() as db:
+        db: AsyncSession
+        yield db
+
+
+def encode_cursor(last_id: Any, last_key: Any = None) -> str:
+    # `last_key` is the sort value of the last row when not sorted by id.
+    payload = {'id': last_id}
+    if last_key is not None:
+        payload['key'] = last_key
+    payload = json.dumps(payload, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Any:
+    """
+    The last id of the previous page, or its (sort value, id) pair when
+    sorted by another column.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if 'key' in payload:
+            return [payload['key'], payload['id']]
+        return payload['id']
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor."
+        )
+
+
 class CommonQueryParams:
-    def __init__(self, skip: int = 0, limit: int = 100) -> None:
+    def __init__(
+        self,
+        request: Request,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        count: Optional[CountMode] = None,
+    ) -> None:
+        self.url = request.url
         self.skip = skip
         self.limit = limit
+        self.after = decode_cursor(cursor) if cursor else None
+        # Passed to the get_multi methods, which fill it in.
+        self.total = TotalCount(count) if count else None
+
+    def set_next_cursor(
+        self,
+        response: Response,
+        items: List[Any],
+        order: Optional[Order] = None
+    ) -> None:
+        """
+        Expose the cursor of the next page, only when this page is full.
+        """
+        last_id = last_key = None
+        if items:
+            last = items[-1]
+            last_id = last['id'] if isinstance(last, dict) else last.id
+            last_key = order.cursor_key(last) if order else None
+        self.set_next_cursor_id(response, len(items), last_id, last_key)
+
+    def set_next_cursor_id(
+        self,
+        response: Response,
+        count: int,
+        last_id: Any,
+        last_key: Any = None
+    ) -> None:
+        """
+        Also expose the total when one was asked for, and the RFC 8288
+        links to the first, previous, next and last pages.
+
+        The last page is only linked for exact totals up to
+        EXACT_COUNT_LIMIT: it is reached with `skip`, and the database
+        walks every skipped row.
+        """
+        links = {'first': self._page_url()}
+        if self.after is None and self.skip:
+            links['prev'] = self._page_url(skip=max(self.skip - self.limit, 0))
+        if count == self.limit:
+            cursor = encode_cursor(last_id, jsonable_encoder(last_key))
+            response.headers['X-Next-Cursor'] = cursor
+            links['next'] = self._page_url(cursor=cursor)
+        if self.total is not None and self.total.value is not None:
+            response.headers['X-Total-Count'] = str(self.total.value)
+            if self.total.estimated:
+                response.headers['X-Total-Count-Estimated'] = 'true'
+            if (self.limit > 0 and not self.total.estimated
+                    and self.total.value <= settings.EXACT_COUNT_LIMIT):
+                last_skip = max(self.total.value - 1, 0) // self.limit
+                links['last'] = self._page_url(skip=last_skip * self.limit)
+        response.headers['Link'] = ', '.join(
+            f'<{url}>; rel="{rel}"' for rel, url in links.items()
+        )
+
+    def _page_url(self, **page: Any) -> str:
+        # This request's URL, with `page` instead of its skip and cursor.
+        url = self.url.remove_query_params(['skip', 'cursor'])
+        page = {key: value for key, value in page.items() if value}
+        return str(url.include_query_params(**page) if page else url)
+
+
+class FilterParams:
+    """
+    Dependency parsing the filters of a list request against `spec`, see
+    FilterSpec, with its `order_by` and `fields` parameters.
+    """
+
+    def __init__(self, spec: FilterSpec) -> None:
+        self.spec = spec
+
+    def __call__(
+        self,
+        request: Request,
+        order_by: Optional[str] = None,
+        fields: Optional[str] = None,
+    ) -> Filters:
+        return self.spec.parse(
+            request.query_params, order_by=order_by, fields=fields
+        )
+
+
+def filter_error_handler(request: Request, exc: FilterError) -> Response:
+    return ORJSONResponse(
+        {'detail': str(exc)}, status_code=status.HTTP_400_BAD_REQUEST
+    )
+
+
+def rows_response(
+    response: Response, rows: List[Dict[str, Any]]
+) -> Response:
+    """
+    Encode rows rendered by `get_multi_rows_async` with orjson, skipping the
+    response_model validation, and keep the headers set on `response`.
+    """
+    return ORJSONResponse(rows, headers=dict(response.headers))
+
+
+def json_response(response: Response, body: str) -> Response:
+    """
+    Send JSON already rendered by the database, keeping the headers set on
+    `response`.
+    """
+    return Response(
+        body, media_type='application/json', headers=dict(response.headers)
+    )
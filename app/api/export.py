@@ -0,0 +1,66 @@
+import csv
+import io
+from typing import Any, AsyncIterator, Dict, List
+import orjson
+from fastapi.responses import StreamingResponse
+from app.schemas import ExportFormat
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: 'application/x-ndjson',
+    ExportFormat.csv: 'text/csv',
+}
+
+
+def _flatten(document: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+    # Nested documents become dotted columns, e.g. "student.first_name".
+    flat = {}
+    for key, value in document.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f'{prefix}{key}.'))
+        else:
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+async def _ndjson(batches: AsyncIterator[List[Dict[str, Any]]]):
+    async for batch in batches:
+        yield b''.join(orjson.dumps(row) + b'\n' for row in batch)
+
+
+async def _csv(batches: AsyncIterator[List[Dict[str, Any]]]):
+    buffer = io.StringIO()
+    writer = None
+    async for batch in batches:
+        for row in batch:
+            row = _flatten(row)
+            if writer is None:
+                writer = csv.DictWriter(buffer, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def export_response(
+    batches: AsyncIterator[List[Dict[str, Any]]],
+    format: ExportFormat,
+    name: str,
+) -> StreamingResponse:
+    """
+    Stream batches of rows as NDJSON or CSV, one chunk per batch, so memory
+    stays flat whatever the number of rows.
+    """
+    if format is ExportFormat.ndjson:
+        body = _ndjson(batches)
+    else:
+        body = _csv(batches)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="{name}.{format.value}"'
+            ),
+        },
+    )
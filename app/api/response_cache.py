@@ -0,0 +1,247 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
+from fastapi import Request, Response
+from app.api.conditional import etag_matches
+from app.core.config import settings
+from app.core.instrumentation import TimedRoute
+from app.db import invalidation
+from app.db.base import Base
+from app.db.replicas import PRIMARY_PIN_COOKIE, is_pinned_to_primary
+
+# A tag is (table, id), or (table, None) for "any row of table".
+Tag = Tuple[str, Optional[str]]
+
+
+class _Entry:
+    __slots__ = ('body', 'headers', 'tags', 'size', 'stored_at')
+
+    def __init__(self, body: bytes, headers: Dict[str, str],
+                 tags: List[Tag]) -> None:
+        self.body = body
+        self.headers = headers
+        self.tags = tags
+        self.size = len(body) + sum(
+            len(key) + len(value) for key, value in headers.items()
+        )
+        self.stored_at = time.monotonic()
+
+
+class ResponseCache:
+    """
+    LRU cache of encoded response bodies, bounded by their total size and
+    invalidated by tag.
+
+    A response is only stored if none of its tables was invalidated while
+    it was rendered (see `generation`), nor for `settle` seconds before,
+    the time the read replicas may take to catch up with a write.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, settle: float = 0) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.settle = settle
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Any, _Entry]' = OrderedDict()
+        # table -> id (None for any row) -> keys of the entries tagged so.
+        self._tags: Dict[str, Dict[Optional[str], Set[Any]]] = (
+            defaultdict(lambda: defaultdict(set))
+        )
+        # Invalidations per table, None for all tables, and the last time.
+        self._generations: Dict[Optional[str], int] = defaultdict(int)
+        self._invalidated_at: Dict[Optional[str], float] = {}
+        self.size = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, key: Any) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                time.monotonic() - entry.stored_at < self.ttl
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            if entry is not None:
+                self._discard(key)
+            self.misses += 1
+            return None
+
+    def generation(self, tables: List[str]) -> Optional[Tuple[int, ...]]:
+        """
+        Snapshot of the invalidations of `tables`, to take before rendering
+        a response from them and pass to `set`. None when one of them was
+        invalidated less than `settle` seconds ago: the response must not
+        be stored then.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if any(
+                now - self._invalidated_at.get(table, float('-inf'))
+                < self.settle
+                for table in [None, *tables]
+            ):
+                return None
+            return tuple(
+                self._generations[table] for table in [None, *tables]
+            )
+
+    def set(self, key: Any, entry: _Entry, tables: List[str],
+            generation: Tuple[int, ...]) -> None:
+        """
+        Store `entry`, rendered from `tables`, unless one of them was
+        invalidated since `generation` was taken.
+        """
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            if generation != tuple(
+                self._generations[table] for table in [None, *tables]
+            ):
+                return
+            self._discard(key)
+            self._entries[key] = entry
+            self.size += entry.size
+            for table, id in entry.tags:
+                self._tags[table][id].add(key)
+            while self.size > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(
+        self, table: Optional[str], ids: Optional[List[Any]]
+    ) -> None:
+        with self._lock:
+            self._generations[table] += 1
+            self._invalidated_at[table] = time.monotonic()
+            if table is None:
+                keys = set(self._entries)
+            elif ids is None:
+                keys = set().union(*self._tags.get(table, {}).values())
+            else:
+                tagged = self._tags.get(table, {})
+                keys = set(tagged.get(None, ()))
+                for id in ids:
+                    keys |= tagged.get(str(id), set())
+            for key in keys:
+                self._discard(key)
+            self.invalidations += len(keys)
+
+    def _discard(self, key: Any) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.size -= entry.size
+        for table, id in entry.tags:
+            keys = self._tags[table][id]
+            keys.discard(key)
+            if not keys:
+                del self._tags[table][id]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'size': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+response_cache = ResponseCache(
+    settings.RESPONSE_CACHE_MAX_BYTES, settings.RESPONSE_CACHE_TTL,
+    settle=settings.DB_REPLICA_MAX_LAG if settings.DB_REPLICA_URIS else 0
+)
+invalidation.subscribe(response_cache.invalidate)
+
+
+def cache_response(*models: Type[Base], by_id: Optional[str] = None):
+    """
+    Mark a GET endpoint reading `models` as cacheable by CachedRoute.
+
+    Its cached responses are dropped by any write to one of the models'
+    tables, except for the first model when `by_id` names the path
+    parameter holding its id: then only writes to that row drop them.
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.response_cache_policy = ([
+            model.__tablename__ for model in models
+        ], by_id)
+        return endpoint
+    return decorator
+
+
+class CachedRoute(TimedRoute):
+    """
+    Route serving the endpoints marked with `cache_response` from the
+    response cache, skipping their dependencies, queries and encoding.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        policy = getattr(self.endpoint, 'response_cache_policy', None)
+        if policy is None:
+            return handler
+        tables, by_id = policy
+
+        async def cached_handler(request: Request) -> Response:
+            # A client reading its own writes skips the cache, like it
+            # skips the replicas.
+            if request.method != 'GET' or is_pinned_to_primary(
+                request.cookies.get(PRIMARY_PIN_COOKIE)
+            ):
+                return await handler(request)
+            key = (request.url.path, tuple(sorted(
+                request.query_params.multi_items()
+            )))
+            entry = response_cache.get(key)
+            if entry is None:
+                # Taken first: a write invalidating the tables while the
+                # handler reads them must keep its response out.
+                generation = response_cache.generation(tables)
+                response = await handler(request)
+                if (
+                    generation is not None
+                    and response.status_code == 200
+                    and hasattr(response, 'body')
+                ):
+                    response_cache.set(key, _Entry(
+                        response.body,
+                        {
+                            name: value
+                            for name, value in response.headers.items()
+                            if name != 'content-length'
+                        },
+                        self._tags(request, tables, by_id),
+                    ), tables, generation)
+                return response
+            etag = entry.headers.get('etag')
+            if_none_match = request.headers.get('if-none-match')
+            if etag and if_none_match and etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers=entry.headers)
+            return Response(entry.body, headers=entry.headers)
+
+        return cached_handler
+
+    @staticmethod
+    def _tags(request: Request, tables: List[str],
+              by_id: Optional[str]) -> List[Tag]:
+        if by_id is None:
+            return [(table, None) for table in tables]
+        first, *rest = tables
+        return [(first, str(request.path_params[by_id]))] + [
+            (table, None) for table in rest
+        ]
@@ -0,0 +1,57 @@
+import codecs
+import csv
+from typing import Any, Iterator, Optional
+import orjson
+from fastapi import HTTPException, UploadFile, status
+from app.schemas import ExportFormat
+
+
+def _ndjson(file) -> Iterator[Any]:
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            yield orjson.loads(line)
+        except orjson.JSONDecodeError:
+            # Reported against its row by the importer.
+            yield None
+
+
+def _csv(file) -> Iterator[Any]:
+    # Decoded line by line: io.TextIOWrapper needs readable(), which
+    # SpooledTemporaryFile, the type of UploadFile.file, lacks before
+    # Python 3.11.
+    try:
+        yield from csv.DictReader(codecs.iterdecode(file, 'utf-8-sig'))
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV upload must be encoded in UTF-8."
+        )
+    except csv.Error as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid CSV upload: {exc}."
+        )
+
+
+def read_upload(
+    upload: UploadFile, format: Optional[ExportFormat] = None
+) -> Iterator[Any]:
+    """
+    Iterate the records of an NDJSON or CSV upload lazily, with the format
+    taken from the file extension unless given.
+    """
+    if format is None:
+        extension = (upload.filename or '').rsplit('.', 1)[-1].lower()
+        try:
+            format = ExportFormat(extension)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Upload must be a .csv or .ndjson file."
+            )
+    upload.file.seek(0)
+    if format is ExportFormat.ndjson:
+        return _ndjson(upload.file)
+    return _csv(upload.file)
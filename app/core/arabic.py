@@ -0,0 +1,51 @@
+import re
+from difflib import SequenceMatcher
+
+# Hamza carriers and alef variants are folded to their bare letter, ta
+# marbuta to ha and alef maqsura to ya. Must stay in sync with the
+# normalize_arabic() SQL function backing the student name index.
+FOLDED_LETTERS = {
+    'آ': 'ا',  # alef with madda above
+    'أ': 'ا',  # alef with hamza above
+    'إ': 'ا',  # alef with hamza below
+    'ٱ': 'ا',  # alef wasla
+    'ة': 'ه',  # ta marbuta
+    'ى': 'ي',  # alef maqsura
+    'ؤ': 'و',  # waw with hamza above
+    'ئ': 'ي',  # ya with hamza above
+}
+# Harakat, tanween, shadda, sukun, superscript alef and tatweel are dropped.
+REMOVED_MARKS = ''.join(
+    chr(code) for code in range(0x064B, 0x0653)
+) + 'ٰـ'
+
+_TRANSLATION = str.maketrans({
+    **FOLDED_LETTERS, **dict.fromkeys(REMOVED_MARKS)
+})
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_arabic(text: str) -> str:
+    """
+    Fold spelling variants of Arabic text, so that e.g. "أحمد" and "احمد"
+    or "فاطمة" and "فاطمه" compare equal. Latin letters are lowercased.
+    """
+    return _SPACES.sub(' ', text.lower().translate(_TRANSLATION)).strip()
+
+
+def name_block_key(first_name: str, last_name: str) -> str:
+    """
+    Key grouping the students whose names may be spellings of the same
+    name, like the generated students.name_block_key column.
+    """
+    return normalize_arabic(f'{first_name} {last_name}')
+
+
+def name_similarity(name: str, other_name: str) -> float:
+    """
+    Similarity of two names between 0 and 1, once spelling variants are
+    folded: the share of their letters in common, in order.
+    """
+    return SequenceMatcher(
+        None, normalize_arabic(name), normalize_arabic(other_name)
+    ).ratio()
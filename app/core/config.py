@@ -2,6 +2,8 @@ from functools import lru_cache
 from typing import (
     Any,
     Dict,
+    List,
+    Literal,
     Optional,
 )
 from pydantic import (
@@ -11,6 +13,14 @@ from pydantic import (
 )
 
 
+def as_async_uri(uri: str) -> str:
+    """
+    Point a postgres DSN at the asyncpg driver.
+    """
+    _, _, rest = uri.partition("://")
+    return f"postgresql+asyncpg://{rest}"
+
+
 class Settings(BaseSettings):
     PROJECT_NAME: str = "FastAPI School Management System"
     API_V1_STR: str = "/api/v1"
@@ -36,6 +46,100 @@ class Settings(BaseSettings):
             path=f"/{values.get('DB_NAME') or  ''}",
         )
 
+    SQLALCHEMY_ASYNC_DATABASE_URI: Optional[PostgresDsn] = None
+
+    @validator("SQLALCHEMY_ASYNC_DATABASE_URI", pre=True)
+    def assemble_async_db_connection(
+        cls, v: Optional[str], values: Dict[str, Any]
+    ) -> Any:
+        if isinstance(v, str):
+            return v
+        # Same database as the sync engine, through the asyncpg driver.
+        return as_async_uri(str(values.get("SQLALCHEMY_DATABASE_URI")))
+
+    # Pool of the sync engine, serving the writes, per worker process.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Pool of the async engine serving the GET routes, and of each read
+    # replica's, per worker process.
+    DB_ASYNC_POOL_SIZE: int = 5
+    DB_ASYNC_MAX_OVERFLOW: int = 10
+    # Seconds after which a connection is replaced; -1 keeps them forever.
+    DB_POOL_RECYCLE: int = 1800
+    # Seconds to wait for a free connection before failing the request.
+    DB_POOL_TIMEOUT: float = 30
+    # Test each connection with a round trip on checkout. When off, dead
+    # connections are only detected when a statement fails on them.
+    DB_POOL_PRE_PING: bool = True
+    # Reuse the most recently returned connection first, letting surplus
+    # idle connections age out through DB_POOL_RECYCLE.
+    DB_POOL_USE_LIFO: bool = False
+    # Connections to open on startup, so the first requests don't pay for
+    # connecting. Capped at each pool's size.
+    DB_POOL_WARMUP: int = 0
+
+    # Read replicas serving the GET endpoints, as JSON list of DSNs.
+    DB_REPLICA_URIS: List[PostgresDsn] = []
+    # A replica lagging more than this many seconds is skipped.
+    DB_REPLICA_MAX_LAG: float = 5.0
+    # How long a replica lag measurement is trusted before re-checking.
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = 5.0
+    # Pin a client's reads to the primary for this many seconds after it
+    # writes, so it reads its own writes. 0 disables pinning.
+    DB_READ_YOUR_WRITES_SECONDS: int = 5
+
+    # Requests slower than this, or issuing more queries than this, are
+    # logged as warnings by the request instrumentation.
+    SLOW_REQUEST_MS: float = 500
+    SLOW_REQUEST_QUERIES: int = 20
+
+    # How list routes render: "orm" validates ORM objects through the
+    # response schemas, "rows" maps Core rows straight to JSON. "database"
+    # has Postgres build the JSON of /registrations and /students, other
+    # lists then render as "rows".
+    LIST_RENDER_MODE: Literal["orm", "rows", "database"] = "orm"
+
+    # Students born the same day to the same guardian phone are duplicate
+    # candidates only when their first names are at least this similar,
+    # from 0 to 1 (see app.core.arabic.name_similarity), so that twins
+    # aren't. Students with the same normalized name always are.
+    DUPLICATE_NAME_SIMILARITY: float = 0.8
+
+    # Lists asked for count=auto report exact totals up to this many rows,
+    # then the planner's estimate, instead of counting every row.
+    EXACT_COUNT_LIMIT: int = 10000
+
+    # Seconds the grades, subjects, nationalities and school years caches
+    # are trusted without any invalidation, for writes made outside the API.
+    REFERENCE_CACHE_TTL: float = 300
+
+    # Encoded GET responses kept in memory per worker, in bytes, and the
+    # longest a response is served without any invalidation.
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESPONSE_CACHE_TTL: float = 60
+
+    # Statements slower than this are written with their bind parameters,
+    # long lists and strings cut short, and plan to the slow query log.
+    SLOW_QUERY_MS: float = 200
+    # Share of slow statements that are logged, between 0 and 1.
+    SLOW_QUERY_SAMPLE_RATE: float = 1.0
+    # How the plan of a slow statement is captured, on the request path:
+    # "plan" runs a plain EXPLAIN, which only plans it. "analyze" re-runs
+    # slow SELECTs under EXPLAIN (ANALYZE, BUFFERS), doubling their cost;
+    # prefer Postgres' auto_explain to get actual timings in production.
+    SLOW_QUERY_EXPLAIN: Literal["off", "plan", "analyze"] = "plan"
+
+    @validator("SLOW_QUERY_EXPLAIN", pre=True)
+    def parse_slow_query_explain(cls, v: Any) -> Any:
+        # Formerly a boolean switching EXPLAIN ANALYZE on.
+        if isinstance(v, bool) or str(v).lower() in ("true", "false"):
+            return "analyze" if str(v).lower() == "true" else "off"
+        return v
+
+    SLOW_QUERY_LOG_FILE: str = "slow_queries.log"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUP_COUNT: int = 5
+
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -0,0 +1,172 @@
+import asyncio
+import functools
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.slow_queries import record_statement
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetrics:
+    """
+    Timings collected while serving one request.  The object is shared by
+    reference with the threadpool and middleware tasks the request runs in,
+    so it is mutated in place rather than replaced.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.route: Optional[str] = None
+        self.queries = 0
+        self.db_ms = 0.0
+        self.serialize_ms = 0.0
+        self.endpoint_done: Optional[float] = None
+
+    @property
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+
+_request_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    'request_metrics', default=None
+)
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    return _request_metrics.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _finish_query(conn) -> float:
+    started = conn.info['query_started'].pop()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.queries += 1
+        metrics.db_ms += elapsed_ms
+    return elapsed_ms
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    elapsed_ms = _finish_query(conn)
+    record_statement(conn, statement, parameters, executemany, elapsed_ms)
+
+
+def _handle_error(context) -> None:
+    # A failing statement never reaches after_cursor_execute: drop its
+    # start time, or it would pile up on the pooled connection.
+    conn = context.connection
+    if (
+        conn is not None and context.execution_context is not None
+        and conn.info.get('query_started')
+    ):
+        _finish_query(conn)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Count statements and database time per request, and feed the slow
+    query log, on a sync engine or on the sync_engine of an AsyncEngine.
+    """
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+
+def _mark_endpoint_done() -> None:
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.endpoint_done = time.perf_counter()
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_done()
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_done()
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """
+    Route recording how long the response_model validation and encoding
+    took, i.e. the time between the endpoint returning and the response
+    being ready.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any) -> None:
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            response = await handler(request)
+            metrics = current_metrics()
+            if metrics is not None:
+                metrics.route = self.path_format
+                if metrics.endpoint_done is not None:
+                    metrics.serialize_ms = (
+                        time.perf_counter() - metrics.endpoint_done
+                    ) * 1000
+            return response
+
+        return timed_handler
+
+
+async def instrument_request(request: Request, call_next) -> Response:
+    """
+    Middleware reporting each request's query count, database time and
+    serialization time in a Server-Timing header and a structured log line.
+    """
+    metrics = RequestMetrics()
+    token = _request_metrics.set(metrics)
+    try:
+        response = await call_next(request)
+    finally:
+        _request_metrics.reset(token)
+    total_ms = metrics.total_ms
+    response.headers['Server-Timing'] = ', '.join([
+        f'db;dur={metrics.db_ms:.1f};desc="{metrics.queries} queries"',
+        f'serialize;dur={metrics.serialize_ms:.1f}',
+        f'total;dur={total_ms:.1f}',
+    ])
+    slow = (
+        total_ms > settings.SLOW_REQUEST_MS
+        or metrics.queries > settings.SLOW_REQUEST_QUERIES
+    )
+    logger.log(logging.WARNING if slow else logging.INFO, json.dumps({
+        'method': request.method,
+        'path': request.url.path,
+        'route': metrics.route,
+        'status': response.status_code,
+        'queries': metrics.queries,
+        'db_ms': round(metrics.db_ms, 1),
+        'serialize_ms': round(metrics.serialize_ms, 1),
+        'total_ms': round(total_ms, 1),
+        'slow': slow,
+    }))
+    return response
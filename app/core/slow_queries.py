@@ -0,0 +1,179 @@
+import functools
+import json
+import logging
+import random
+import re
+import threading
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+# The plans go to their own rotating file rather than the application log.
+logger.propagate = False
+
+# Distinct statements kept by the aggregator; further new ones are dropped.
+MAX_TRACKED_STATEMENTS = 1000
+# Bind parameters are logged cut down to this many items per list and
+# characters per string: a bulk lookup can bind thousands of keys.
+MAX_LOGGED_ITEMS = 10
+MAX_LOGGED_CHARS = 200
+
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s|\$\d+')
+_IN_LIST = re.compile(r'IN \((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+_VALUES_LIST = re.compile(r'(\([^()]*\))(?:\s*,\s*\([^()]*\))+')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w$])\d+(?:\.\d+)?\b')
+_WHITESPACE = re.compile(r'\s+')
+
+
+@functools.lru_cache(maxsize=MAX_TRACKED_STATEMENTS)
+def normalize_sql(statement: str) -> str:
+    """
+    Reduce a statement to its shape, so executions differing only in
+    literals, IN-list lengths or number of VALUES rows aggregate together.
+    """
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    statement = _STRING.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    statement = _PLACEHOLDER.sub('?', statement)
+    statement = _IN_LIST.sub('IN (...)', statement)
+    return _VALUES_LIST.sub(r'\1, ...', statement)
+
+
+class StatementStats:
+    """
+    Calls and timings per normalized statement since startup.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: Dict[str, List[float]] = {}
+
+    def add(self, statement: str, elapsed_ms: float) -> None:
+        with self._lock:
+            entry = self._stats.get(statement)
+            if entry is None:
+                if len(self._stats) >= MAX_TRACKED_STATEMENTS:
+                    return
+                entry = self._stats[statement] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += elapsed_ms
+            entry[2] = max(entry[2], elapsed_ms)
+
+    def top(self, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = sorted(
+                self._stats.items(), key=lambda item: item[1][1], reverse=True
+            )[:limit]
+        return [
+            {
+                'statement': statement,
+                'calls': int(calls),
+                'total_ms': round(total_ms, 3),
+                'mean_ms': round(total_ms / calls, 3),
+                'max_ms': round(max_ms, 3),
+            }
+            for statement, (calls, total_ms, max_ms) in items
+        ]
+
+
+statement_stats = StatementStats()
+
+
+def _configure_logger() -> None:
+    if logger.handlers:
+        return
+    handler = RotatingFileHandler(
+        settings.SLOW_QUERY_LOG_FILE,
+        maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+        backupCount=settings.SLOW_QUERY_LOG_BACKUP_COUNT,
+        encoding='utf-8',
+    )
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+def summarize_parameters(parameters: Any) -> Any:
+    """
+    `parameters` with long lists and strings cut down for the log, noting
+    how much was left out.
+    """
+    if isinstance(parameters, dict):
+        return {
+            key: summarize_parameters(value)
+            for key, value in parameters.items()
+        }
+    if isinstance(parameters, (list, tuple)):
+        items = [
+            summarize_parameters(value)
+            for value in parameters[:MAX_LOGGED_ITEMS]
+        ]
+        if len(parameters) > MAX_LOGGED_ITEMS:
+            items.append(f'... {len(parameters) - MAX_LOGGED_ITEMS} more')
+        return items
+    if isinstance(parameters, (str, bytes)) and (
+        len(parameters) > MAX_LOGGED_CHARS
+    ):
+        return f'{parameters[:MAX_LOGGED_CHARS]!s}... {len(parameters)} long'
+    return parameters
+
+
+def _explain(
+    conn, statement: str, parameters: Any, analyze: bool
+) -> Optional[str]:
+    """
+    Plan a statement with EXPLAIN, or re-run it under EXPLAIN (ANALYZE,
+    BUFFERS) when `analyze` is set, on a separate cursor of the same
+    connection, inside a savepoint so a failure here can't abort the
+    caller's transaction.
+    """
+    explain = 'EXPLAIN (ANALYZE, BUFFERS) ' if analyze else 'EXPLAIN '
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            cursor.execute(explain + statement, parameters)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        except Exception:
+            cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            return None
+        cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        return plan
+    except Exception:
+        return None
+    finally:
+        cursor.close()
+
+
+def record_statement(conn, statement: str, parameters: Any,
+                     executemany: bool, elapsed_ms: float) -> None:
+    """
+    Aggregate every statement, and log the ones over SLOW_QUERY_MS with
+    their plan.  Only a SLOW_QUERY_SAMPLE_RATE share of slow statements is
+    logged.  With SLOW_QUERY_EXPLAIN=analyze only SELECTs are explained,
+    since ANALYZE executes them.
+    """
+    normalized = normalize_sql(statement)
+    statement_stats.add(normalized, elapsed_ms)
+    if (
+        elapsed_ms < settings.SLOW_QUERY_MS
+        or random.random() >= settings.SLOW_QUERY_SAMPLE_RATE
+    ):
+        return
+    plan = None
+    analyze = settings.SLOW_QUERY_EXPLAIN == 'analyze'
+    if (
+        settings.SLOW_QUERY_EXPLAIN != 'off'
+        and not executemany
+        and (not analyze or statement.lstrip()[:6].upper() == 'SELECT')
+    ):
+        plan = _explain(conn, statement, parameters, analyze)
+    _configure_logger()
+    logger.info(json.dumps({
+        'duration_ms': round(elapsed_ms, 3),
+        'statement': normalized,
+        'parameters': summarize_parameters(parameters),
+        'plan': plan,
+    }, default=str, ensure_ascii=False))
@@ -1,5 +1,7 @@
 from typing import (
+    AsyncIterator,
     Generic,
+    Sequence,
     Type,
     TypeVar,
     List,
@@ -7,11 +9,30 @@ from typing import (
     Any,
     Union,
     Optional,
+    Tuple,
 )
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    delete,
+    exists,
+    func,
+    inspect,
+    literal_column,
+    select,
+    Text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ONETOMANY, Session
+from sqlalchemy.sql import Select
 from pydantic import BaseModel
+from app.crud.filters import FilterError, Filters, FilterSpec
+from app.crud.projection import compile_projection
+from app.crud.total_count import TotalCount
 from app.db.base import Base
+from app.db.invalidation import publish
 
 ModelType = TypeVar('ModelType', bound=Base)
 CreateSchemaType = TypeVar('CreateSchemaType', bound=BaseModel)
@@ -19,25 +40,268 @@ UpdateSchemaType = TypeVar('UpdateSchemaType', bound=BaseModel)
 
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
-    def __init__(self, model: Type[ModelType]) -> None:
+    def __init__(
+        self,
+        model: Type[ModelType],
+        *,
+        load_options: Sequence[Any] = (),
+        filter_spec: Optional[FilterSpec] = None
+    ) -> None:
+        """
+        `load_options` are loader options (e.g. `joinedload(...)`) applied
+        to every read, so the relationships nested in the response schemas
+        are fetched up front instead of lazily, one query per row.
+
+        `filter_spec` declares the filters and sort orders the list
+        endpoints accept, parsed into the `filters` of the get_multi
+        methods.
+        """
         self.model = model
+        self.load_options = tuple(load_options)
+        self.filter_spec = filter_spec
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 20, params: Dict[str, Any] = None
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 20,
+        params: Dict[str, Any] = None,
+        after: Optional[Any] = None,
+        filters: Optional[Filters] = None
     ) -> List[ModelType]:
-        query = db.query(self.model)
+        stmt = self._multi_statement(
+            skip=skip, limit=limit, params=params, after=after,
+            filters=filters
+        )
+        return db.execute(stmt).scalars().all()
+
+    async def get_multi_async(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 20,
+        params: Dict[str, Any] = None,
+        after: Optional[Any] = None,
+        filters: Optional[Filters] = None,
+        total: Optional[TotalCount] = None
+    ) -> List[ModelType]:
+        """
+        `total`, when given, is filled with the number of rows matching
+        `params` and `filters`, from the same query as the page.
+        """
+        stmt = self._multi_statement(
+            skip=skip, limit=limit, params=params, after=after,
+            filters=filters
+        )
+        if total is None:
+            return (await db.execute(stmt)).scalars().all()
+        rows = (await db.execute(
+            self._with_total(stmt, total, params, filters)
+        )).all()
+        await total.resolve(db, rows)
+        return [row[0] for row in rows]
+
+    async def get_multi_rows_async(
+        self,
+        db: AsyncSession,
+        schema: Type[BaseModel],
+        *,
+        skip: int = 0,
+        limit: int = 20,
+        params: Dict[str, Any] = None,
+        after: Optional[Any] = None,
+        filters: Optional[Filters] = None,
+        total: Optional[TotalCount] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Same page as `get_multi_async`, rendered straight from Core rows
+        into `schema`-shaped dicts, ready for `ORJSONResponse`.
+        """
+        projection = compile_projection(self.model, schema)
+        stmt = self._paginate(
+            projection.select(),
+            skip=skip, limit=limit, params=params, after=after,
+            filters=filters
+        )
+        if total is not None:
+            stmt = self._with_total(stmt, total, params, filters)
+        rows = (await db.execute(stmt)).all()
+        if total is not None:
+            await total.resolve(db, rows)
+        return [projection.build(row) for row in rows]
+
+    async def get_multi_json_async(
+        self,
+        db: AsyncSession,
+        schema: Type[BaseModel],
+        *,
+        skip: int = 0,
+        limit: int = 20,
+        params: Dict[str, Any] = None,
+        after: Optional[Any] = None,
+        filters: Optional[Filters] = None,
+        total: Optional[TotalCount] = None
+    ) -> Tuple[str, int, Optional[Any], Optional[Any]]:
+        """
+        Same page as `get_multi_async`, rendered by Postgres as a JSON array
+        of `schema` documents. Returns the array's text, ready to be sent
+        as is, with the number of rows, and the last row's id and sort
+        value for the cursor.
+        """
+        projection = compile_projection(self.model, schema)
+        order = filters.order if filters else None
+        sort_column = order.columns[0] if order else self.model.id
+        page = self._paginate(
+            projection.select(
+                projection.json_object.label('doc'),
+                self.model.id.label('id'),
+                sort_column.label('sort_key'),
+            ),
+            skip=skip, limit=limit, params=params, after=after,
+            filters=filters
+        ).subquery()
+        page_order = [page.c.sort_key, page.c.id]
+        reverse_order = [key.desc() for key in page_order]
+        if order is not None and order.descending:
+            page_order, reverse_order = reverse_order, page_order
+        stmt = select(
+            func.coalesce(
+                func.json_agg(aggregate_order_by(page.c.doc, *page_order)),
+                literal_column("'[]'::json"),
+            ).cast(Text),
+            func.count(),
+            func.array_agg(aggregate_order_by(page.c.id, *reverse_order))[1],
+            func.array_agg(
+                aggregate_order_by(page.c.sort_key, *reverse_order)
+            )[1],
+        )
+        if total is not None:
+            stmt = self._with_total(stmt, total, params, filters)
+        row = (await db.execute(stmt)).one()
+        if total is not None:
+            await total.resolve(db, [row])
+        body, count, last_id, last_key = row[:4]
+        if order is None or len(order.columns) == 1:
+            last_key = None
+        return body, count, last_id, last_key
+
+    async def stream_rows_async(
+        self,
+        db: AsyncSession,
+        schema: Type[BaseModel],
+        *,
+        params: Dict[str, Any] = None,
+        filters: Optional[Filters] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Every row matching `params` and `filters`, in the order of `filters`,
+        rendered like `get_multi_rows_async`, in batches fetched from a
+        server-side cursor.
+        """
+        projection = compile_projection(self.model, schema)
+        stmt = self._filter(projection.select(), params)
+        order = None
+        if filters is not None:
+            stmt = stmt.where(*filters.clauses)
+            order = filters.order
+        if order is None:
+            stmt = stmt.order_by(self.model.id)
+        else:
+            stmt = stmt.order_by(*order.clauses())
+        result = await db.stream(stmt)
+        async for rows in result.partitions(batch_size):
+            yield [projection.build(row) for row in rows]
+
+    def get(self, db: Session, id: int) -> Optional[ModelType]:
+        return db.execute(self._get_statement(id)).scalars().first()
+
+    async def get_async(self, db: AsyncSession, id: int) -> Optional[ModelType]:
+        return (await db.execute(self._get_statement(id))).scalars().first()
+
+    def _multi_statement(
+        self,
+        *,
+        skip: int,
+        limit: int,
+        params: Optional[Dict[str, Any]],
+        after: Optional[Any],
+        filters: Optional[Filters] = None
+    ) -> Select:
+        return self._paginate(
+            select(self.model).options(*self.load_options),
+            skip=skip, limit=limit, params=params, after=after,
+            filters=filters
+        )
+
+    def _paginate(
+        self,
+        stmt: Select,
+        *,
+        skip: int,
+        limit: int,
+        params: Optional[Dict[str, Any]],
+        after: Optional[Any],
+        filters: Optional[Filters] = None
+    ) -> Select:
+        stmt = self._filter(stmt, params)
+        order = None
+        if filters is not None:
+            stmt = stmt.where(*filters.clauses)
+            order = filters.order
+        if order is None:
+            # Always order by the primary key, so pages are stable.
+            stmt = stmt.order_by(self.model.id)
+        else:
+            # Ties on the sort column are broken by the primary key.
+            stmt = stmt.order_by(*order.clauses())
+        if after is not None:
+            # Keyset pagination: seek past the last row of the previous page
+            # through the primary key index instead of discarding `skip` rows.
+            if order is not None:
+                stmt = stmt.where(order.seek(after))
+            elif isinstance(after, (list, tuple)):
+                raise FilterError('Pagination cursor does not match order_by.')
+            else:
+                stmt = stmt.where(self.model.id > after)
+        else:
+            stmt = stmt.offset(skip)
+        return stmt.limit(limit)
+
+    def _with_total(
+        self,
+        stmt: Select,
+        total: TotalCount,
+        params: Optional[Dict[str, Any]],
+        filters: Optional[Filters]
+    ) -> Select:
+        # The ids matching the request, regardless of the page.
+        matching = self._filter(select(self.model.id), params)
+        if filters is not None:
+            matching = matching.where(*filters.clauses)
+        return stmt.add_columns(*total.columns(self.model, matching))
+
+    def _filter(
+        self, stmt: Select, params: Optional[Dict[str, Any]]
+    ) -> Select:
         if params:
             for attr in [x for x in params if params[x] is not None]:
-                query = query.filter(getattr(self.model, attr) == params[attr])
-        return query.offset(skip).limit(limit).all()
+                stmt = stmt.where(getattr(self.model, attr) == params[attr])
+        return stmt
 
-    def get(self, db: Session, id: int) -> Optional[ModelType]:
-        return db.query(self.model).filter(self.model.id == id).first()
+    def _get_statement(self, id: int) -> Select:
+        return select(self.model).options(*self.load_options).where(
+            self.model.id == id
+        )
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
+        db.flush()
+        self._on_write(db, [self._identity(db_obj)])
         db.commit()
         db.refresh(db_obj)
         return db_obj
@@ -58,6 +322,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
         db.add(db_obj)
+        self._on_write(db, [self._identity(db_obj)])
         db.commit()
         db.refresh(db_obj)
         return db_obj
@@ -65,5 +330,99 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def remove(self, db: Session, *, id: int) -> ModelType:
         obj = db.query(self.model).get(id)
         db.delete(obj)
+        self._on_write(db, [id])
         db.commit()
         return obj
+
+    def update_by_id(
+        self,
+        db: Session,
+        *,
+        id: Any,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> Optional[Row]:
+        """
+        Update the row `id` with a single `UPDATE ... RETURNING`, without
+        loading it first. Returns the updated row, which response schemas
+        read like an ORM object, or None when no row has this id.
+        """
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        table = self.model.__table__
+        row = db.execute(
+            update(table)
+            .where(table.c.id == id)
+            .values({
+                field: value for field, value in update_data.items()
+                if field in table.c
+            })
+            .returning(*table.c)
+        ).first()
+        if row is not None:
+            self._on_write(db, [id])
+        db.commit()
+        return row
+
+    def remove_by_id(self, db: Session, *, id: Any) -> Optional[Row]:
+        """
+        Delete the row `id` with a single `DELETE ... RETURNING`. Returns
+        the deleted row, or None when no row has this id.
+
+        ORM cascades don't apply here, subclasses must delete dependent
+        rows themselves.
+        """
+        table = self.model.__table__
+        row = db.execute(
+            delete(table).where(table.c.id == id).returning(*table.c)
+        ).first()
+        if row is not None:
+            self._on_write(db, [id])
+        db.commit()
+        return row
+
+    @staticmethod
+    def _identity(obj: ModelType) -> Any:
+        # The primary key, as a tuple only when it is composite.
+        identity = inspect(obj).identity
+        return identity[0] if len(identity) == 1 else identity
+
+    def _on_write(self, db: Session, ids: Optional[List[Any]]) -> None:
+        """
+        Called by every write method, inside the transaction and before it
+        commits, with the ids written (None when unknown).  Announces the
+        write to the caches of this and the other workers.
+        """
+        publish(db, self.model.__tablename__, ids)
+
+    def has_dependents(self, db: Session, *, id: Any) -> Dict[str, bool]:
+        """
+        Tell, per one-to-many relationship, whether rows still reference
+        the object `id`. One `SELECT EXISTS` per relationship, all sent in
+        a single statement, so no related row is ever loaded.
+        """
+        return self._check_dependents(
+            db, id, lambda criteria: exists().where(*criteria)
+        )
+
+    def count_dependents(self, db: Session, *, id: Any) -> Dict[str, int]:
+        """
+        Count, per one-to-many relationship, the rows referencing `id`.
+        """
+        return self._check_dependents(
+            db, id, lambda criteria: select(func.count()).where(
+                *criteria).scalar_subquery()
+        )
+
+    def _check_dependents(self, db: Session, id: Any, build) -> Dict[str, Any]:
+        checks = [
+            build([
+                remote == id for _, remote in relationship.local_remote_pairs
+            ]).label(relationship.key)
+            for relationship in inspect(self.model).relationships
+            if relationship.direction is ONETOMANY
+        ]
+        if not checks:
+            return {}
+        return dict(db.execute(select(*checks)).one()._mapping)
@@ -0,0 +1,175 @@
+import asyncio
+import threading
+import time
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+)
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.crud.base import (
+    CreateSchemaType,
+    CRUDBase,
+    ModelType,
+    UpdateSchemaType,
+)
+from app.db import invalidation
+from app.db.base import TableVersion
+from app.db.session import AsyncSessionLocal, SessionLocal
+
+# Table versions the current request's ETag was computed from, set by
+# ConditionalGet.
+_request_versions: ContextVar[Optional[Dict[str, int]]] = ContextVar(
+    'request_versions', default=None
+)
+
+
+def observe_table_versions(versions: Dict[str, int]) -> None:
+    """
+    Record that the current request's response is validated by `versions`,
+    so the caches older than them are reloaded rather than served under a
+    newer ETag.
+    """
+    _request_versions.set(versions)
+
+
+class CachedCRUDBase(CRUDBase[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """
+    CRUD for small reference tables, serving reads from an in-process copy
+    of the whole table.
+
+    The copy is dropped when a write goes through this CRUD object or
+    another worker announces one (see CRUDBase._on_write), and at the
+    latest after REFERENCE_CACHE_TTL seconds, for writes made elsewhere.
+    It is always loaded from the primary, never from the caller's session
+    which may be on a lagging replica, as write paths trust it too. A copy
+    older than the table version a request's ETag was computed from is
+    reloaded (see observe_table_versions). Concurrent misses wait for a
+    single load, so a burst of them after an invalidation takes one extra
+    connection per table, not one per request.
+    Cached objects are detached; reads return a copy merged into the
+    caller's session, so changing it never changes the cache.
+    """
+
+    def __init__(self, model, **kwargs) -> None:
+        super().__init__(model, **kwargs)
+        self._lock = threading.Lock()
+        # Held while loading, by the threads of the sync routes and the
+        # tasks of the async ones respectively. The latter is created on
+        # first use, inside the event loop.
+        self._load_lock = threading.Lock()
+        self._async_load_lock: Optional[asyncio.Lock] = None
+        self._rows: Optional[Dict[Any, ModelType]] = None
+        self._loaded_at = 0.0
+        # tableversions.version of the table when the copy was loaded.
+        self._version = 0
+        # Bumped by every invalidation, so a load racing one is not kept.
+        self._generation = 0
+        invalidation.subscribe(self._on_invalidation)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._rows = None
+            self._generation += 1
+
+    def _on_invalidation(self, table: Optional[str], ids) -> None:
+        if table is None or table == self.model.__tablename__:
+            self.invalidate()
+
+    def _fresh_rows(self) -> Optional[Dict[Any, ModelType]]:
+        required = (_request_versions.get() or {}).get(
+            self.model.__tablename__, 0
+        )
+        with self._lock:
+            if (
+                self._rows is not None
+                and time.monotonic() - self._loaded_at
+                < settings.REFERENCE_CACHE_TTL
+                and self._version >= required
+            ):
+                return self._rows
+        return None
+
+    def _load(self, loader: Session) -> Dict[Any, ModelType]:
+        """
+        Load the copy through `loader`, a throwaway session on the primary,
+        so the cached objects belong to no request's session.
+        """
+        generation = self._generation
+        # Read before the rows, which are then at least this recent.
+        version = loader.execute(
+            select(TableVersion.version).where(
+                TableVersion.table_name == self.model.__tablename__
+            )
+        ).scalar()
+        rows = loader.execute(
+            select(self.model).order_by(self.model.id)
+        ).scalars().all()
+        loader.expunge_all()
+        rows = {row.id: row for row in rows}
+        with self._lock:
+            if generation == self._generation:
+                self._rows, self._loaded_at = rows, time.monotonic()
+                self._version = version or 0
+        return rows
+
+    def _cached_rows(self, db: Session) -> Dict[Any, ModelType]:
+        rows = self._fresh_rows()
+        if rows is None:
+            with self._load_lock:
+                # Possibly loaded while waiting for the lock.
+                rows = self._fresh_rows()
+                if rows is None:
+                    with SessionLocal() as loader:
+                        rows = self._load(loader)
+        return rows
+
+    async def _cached_rows_async(
+        self, db: AsyncSession
+    ) -> Dict[Any, ModelType]:
+        rows = self._fresh_rows()
+        if rows is None:
+            if self._async_load_lock is None:
+                self._async_load_lock = asyncio.Lock()
+            async with self._async_load_lock:
+                rows = self._fresh_rows()
+                if rows is None:
+                    async with AsyncSessionLocal() as loader:
+                        rows = await loader.run_sync(self._load)
+        return rows
+
+    def _find(
+        self, db: Session, predicate: Callable[[ModelType], bool]
+    ) -> Optional[ModelType]:
+        """
+        The cached row with the lowest id matching `predicate`, merged into
+        `db`.
+        """
+        for row in self._cached_rows(db).values():
+            if predicate(row):
+                return db.merge(row, load=False)
+        return None
+
+    def get(self, db: Session, id: Any) -> Optional[ModelType]:
+        row = self._cached_rows(db).get(id)
+        return db.merge(row, load=False) if row is not None else None
+
+    async def get_async(
+        self, db: AsyncSession, id: Any
+    ) -> Optional[ModelType]:
+        row = (await self._cached_rows_async(db)).get(id)
+        return await db.merge(row, load=False) if row is not None else None
+
+    async def get_all_async(self, db: AsyncSession) -> List[ModelType]:
+        """
+        Every cached row, in id order. Unlike `get_async`, returns the
+        cache's own detached objects, without merging them into `db`:
+        read them, never change them.
+        """
+        return list((await self._cached_rows_async(db)).values())
@@ -1,6 +1,10 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
+from sqlalchemy.sql import Select
+from app.crud.cached import CachedCRUDBase
+from app.crud.crud_subject import subject as crud_subject
 from app.db.base import (
     Grade,
     Subject,
@@ -12,19 +16,57 @@ from app.schemas import (
 )
 
 
-class CRUDGrade(CRUDBase[Grade, GradeCreate, GradeUpdate]):
+class CRUDGrade(CachedCRUDBase[Grade, GradeCreate, GradeUpdate]):
     def get_by_name(self, db: Session, *, name: str) -> Optional[Grade]:
-        return db.query(self.model).filter(Grade.name == name).first()
+        return self._find(db, lambda grade: grade.name == name)
 
     def get_grade_assigned_or_not_assigned_subjects(self, db: Session, *, grade_id: int, assigned: bool = True) -> Optional[List[Subject]]:
-        subquery = db.query(GradeSubject.subject_id).filter(
-            GradeSubject.grade_id == grade_id
-        ).subquery()
+        stmt = self._grade_subjects_statement(grade_id, assigned)
+        return db.execute(stmt).scalars().all()
+
+    async def get_grade_assigned_or_not_assigned_subjects_async(self, db: AsyncSession, *, grade_id: int, assigned: bool = True) -> Optional[List[Subject]]:
+        stmt = self._grade_subjects_statement(grade_id, assigned)
+        return (await db.execute(stmt)).scalars().all()
+
+    async def get_subject_matrix_async(self, db: AsyncSession) -> Dict[str, Any]:
+        """
+        Every subject, and every grade with the ids of its subjects. Grades
+        and subjects come from their caches, the assignments from a single
+        scan of the gradesubjects primary key.
+        """
+        grades = await self.get_all_async(db)
+        subjects = await crud_subject.get_all_async(db)
+        subject_ids = {grade.id: [] for grade in grades}
+        stmt = select(
+            GradeSubject.grade_id, GradeSubject.subject_id
+        ).order_by(GradeSubject.grade_id, GradeSubject.subject_id)
+        for grade_id, subject_id in await db.execute(stmt):
+            subject_ids.setdefault(grade_id, []).append(subject_id)
+        return {
+            'subjects': subjects,
+            'grades': [
+                {
+                    'id': grade.id,
+                    'name': grade.name,
+                    'numeric_value': grade.numeric_value,
+                    'subject_ids': subject_ids[grade.id],
+                }
+                for grade in grades
+            ],
+        }
+
+    def _grade_subjects_statement(self, grade_id: int, assigned: bool) -> Select:
+        # (Not) EXISTS probes the gradesubjects primary key once per subject,
+        # and unlike NOT IN, is planned as a proper anti-join.
+        assigned_to_grade = exists().where(
+            GradeSubject.grade_id == grade_id,
+            GradeSubject.subject_id == Subject.id,
+        )
         if assigned:
-            subjects = db.query(Subject).filter(Subject.id.in_(subquery)).all()
+            stmt = select(Subject).where(assigned_to_grade)
         else:
-            subjects = db.query(Subject).filter(Subject.id.notin_(subquery)).all()
-        return subjects
+            stmt = select(Subject).where(~assigned_to_grade)
+        return stmt.order_by(Subject.id)
 
 
 grade = CRUDGrade(Grade)
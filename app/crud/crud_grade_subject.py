@@ -20,6 +20,7 @@ class CRUDGradeSubject(CRUDBase[GradeSubject, GradeSubjectCreate, GradeSubjectUp
             self.model.grade_id == grade_id, self.model.subject_id == subject_id
         ).first()
         db.delete(obj)
+        self._on_write(db, [(grade_id, subject_id)])
         db.commit()
         return obj
 
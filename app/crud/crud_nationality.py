@@ -1,8 +1,6 @@
-from operator import or_
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from app.crud.base import CRUDBase
+from app.crud.cached import CachedCRUDBase
 from app.db.base import Nationality
 from app.schemas import (
     NationalityCreate,
@@ -10,12 +8,24 @@ from app.schemas import (
 )
 
 
-class CRUDNationality(CRUDBase[Nationality, NationalityCreate, NationalityUpdate]):
+class CRUDNationality(CachedCRUDBase[Nationality, NationalityCreate, NationalityUpdate]):
     def get_by_name(self, db: Session, masculine_name: str, feminine_name: str) -> Optional[Nationality]:
-        return db.query(self.model).filter(
-            or_(self.model.masculine_form == masculine_name,
-                self.model.feminine_form == feminine_name)
-        ).first()
+        return self._find(
+            db,
+            lambda nationality: nationality.masculine_form == masculine_name
+            or nationality.feminine_form == feminine_name
+        )
+
+    def get_ids_by_name(self, db: Session) -> Dict[str, int]:
+        """
+        Map both the masculine and feminine form of every nationality to its
+        id, from the cache. On clashes the lowest id wins, like get_by_name.
+        """
+        ids = {}
+        for nationality in reversed(list(self._cached_rows(db).values())):
+            ids[nationality.masculine_form] = nationality.id
+            ids[nationality.feminine_form] = nationality.id
+        return ids
 
 
 nationality = CRUDNationality(Nationality)
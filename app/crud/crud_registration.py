@@ -1,19 +1,37 @@
+from collections import defaultdict
 from typing import (
     Optional,
     List,
     Dict,
     Any
 )
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    String,
+    case,
+    cast,
+    column,
+    exists,
+    func,
+    literal,
+    select,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, aliased, joinedload
+from sqlalchemy.types import BigInteger
 from app.crud.base import CRUDBase
 from app.db.base import (
     Registration,
     SchoolYear,
     Grade,
+    Student,
+    RegistrationCounter,
 )
 from app.schemas import (
     RegistrationCreate,
     RegistrationUpdate,
+    RegistrationIn,
+    PromotionAction,
 )
 
 
@@ -36,14 +54,375 @@ class CRUDRegistration(CRUDBase[Registration, RegistrationCreate, RegistrationUp
 
         return query.first()
 
+    def register(
+        self,
+        db: Session,
+        *,
+        student_id: int,
+        grade: Grade,
+        school_year: SchoolYear
+    ) -> Optional[Registration]:
+        """
+        Register a student into `grade` of `school_year` with the next
+        registration number. Returns None, reserving no number, when the
+        student is already registered that year, even by a concurrent
+        request that committed after the caller's own check.
+        """
+        regi_no = self.generate_unique_regi_no(db, school_year, grade)
+        id = db.execute(
+            insert(Registration).values(
+                regi_no=regi_no, student_id=student_id, grade_id=grade.id,
+                school_year_id=school_year.id
+            ).on_conflict_do_nothing(
+                index_elements=['student_id', 'school_year_id']
+            ).returning(Registration.id)
+        ).scalar()
+        if id is None:
+            # Also gives the reserved number back.
+            db.rollback()
+            return None
+        self._on_write(db, [id])
+        db.commit()
+        return self.get(db, id)
+
     def generate_unique_regi_no(self, db: Session, school_year: SchoolYear, grade: Grade) -> str:
-        regi_no = f"{getattr(school_year,'start_date').strftime('%y')}{getattr(school_year,'end_date').strftime('%y')}{getattr(grade,'numeric_value')}"
-        total_students = db.query(Registration).filter(
-            Registration.school_year_id == school_year.id,
-            Registration.grade_id == grade.id
-        ).count() + 1
-        regi_no += str(total_students).rjust(3, '0')
-        return regi_no
+        return self.reserve_regi_nos(db, school_year, grade, count=1)[0]
+
+    def reserve_regi_nos(
+        self, db: Session, school_year: SchoolYear, grade: Grade, count: int
+    ) -> List[str]:
+        """
+        Reserve `count` consecutive registration numbers for a class.
 
+        The per (school year, grade) counter is bumped with a single upsert,
+        whose row lock is held until the caller commits, so concurrent
+        enrollments into the same class can never get the same number.
+        """
+        last_value = self._bump_counters(
+            db, school_year_id=school_year.id, counts={grade.id: count}
+        )[grade.id]
+
+        prefix = self.regi_no_prefix(school_year, grade)
+        return [
+            prefix + str(number).rjust(3, '0')
+            for number in range(last_value - count + 1, last_value + 1)
+        ]
+
+    def _bump_counters(
+        self, db: Session, *, school_year_id: int, counts: Dict[int, int]
+    ) -> Dict[int, int]:
+        """
+        Advance the counters of several grades with one upsert and return
+        the new last value of each one.
+        """
+        # Rows are locked in grade order, so concurrent bulks touching the
+        # same grades wait on each other instead of deadlocking.
+        stmt = insert(RegistrationCounter).values([
+            {'school_year_id': school_year_id,
+                'grade_id': grade_id, 'last_value': count}
+            for grade_id, count in sorted(counts.items())
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                RegistrationCounter.school_year_id, RegistrationCounter.grade_id
+            ],
+            set_={
+                'last_value': RegistrationCounter.last_value + stmt.excluded.last_value
+            }
+        ).returning(RegistrationCounter.grade_id, RegistrationCounter.last_value)
+        return dict(db.execute(stmt).all())
+
+    def create_bulk(
+        self,
+        db: Session,
+        *,
+        school_year: SchoolYear,
+        registrations_in: List[RegistrationIn]
+    ) -> List[Dict[str, Any]]:
+        """
+        Register many students into `school_year` in one transaction.
+
+        Students, grades and existing registrations are checked with one
+        query each, numbers are reserved with one counter upsert and all accepted
+        rows go in with a single multi-row INSERT. Returns one result per
+        input row, in input order, carrying either the new registration
+        or the reason it was rejected.
+        """
+        student_ids = {reg.student_id for reg in registrations_in}
+        grade_ids = {reg.grade_id for reg in registrations_in}
+
+        existing_students = set(db.execute(
+            select(Student.id).where(Student.id.in_(student_ids))
+        ).scalars())
+        grades = {
+            grade.id: grade
+            for grade in db.query(Grade).filter(Grade.id.in_(grade_ids))
+        }
+        registered_students = set(db.execute(
+            select(Registration.student_id).where(
+                Registration.school_year_id == school_year.id,
+                Registration.student_id.in_(student_ids)
+            )
+        ).scalars())
+
+        results = []
+        accepted = defaultdict(list)
+        for reg in registrations_in:
+            result = {
+                'student_id': reg.student_id,
+                'grade_id': reg.grade_id,
+                'registration_id': None,
+                'regi_no': None,
+                'error': None,
+            }
+            if reg.student_id not in existing_students:
+                result['error'] = f'Student with id {reg.student_id} does not exist.'
+            elif reg.grade_id not in grades:
+                result['error'] = f'Grade with id {reg.grade_id} does not exist.'
+            elif reg.student_id in registered_students:
+                result['error'] = "Cannot register student in two classes on the same year."
+            else:
+                registered_students.add(reg.student_id)
+                accepted[reg.grade_id].append(result)
+            results.append(result)
+
+        rows = []
+        last_values = self._bump_counters(
+            db, school_year_id=school_year.id,
+            counts={grade_id: len(items) for grade_id, items in accepted.items()}
+        ) if accepted else {}
+        for grade_id, grade_results in accepted.items():
+            prefix = self.regi_no_prefix(school_year, grades[grade_id])
+            first = last_values[grade_id] - len(grade_results) + 1
+            for number, result in enumerate(grade_results, start=first):
+                regi_no = prefix + str(number).rjust(3, '0')
+                result['regi_no'] = regi_no
+                rows.append({
+                    'regi_no': regi_no,
+                    'student_id': result['student_id'],
+                    'grade_id': grade_id,
+                    'school_year_id': school_year.id,
+                })
+
+        if rows:
+            # Rows that lost a race against a concurrent enrollment are
+            # skipped by the database and reported back as rejected. Any
+            # other conflict, e.g. on regi_no, is a bug and must fail.
+            inserted = dict(db.execute(
+                insert(Registration).values(rows).on_conflict_do_nothing(
+                    index_elements=['student_id', 'school_year_id']
+                ).returning(Registration.regi_no, Registration.id)
+            ).all())
+            for result in results:
+                if result['regi_no'] is None:
+                    continue
+                result['registration_id'] = inserted.get(result['regi_no'])
+                if result['registration_id'] is None:
+                    result['regi_no'] = None
+                    result['error'] = "Cannot register student in two classes on the same year."
+            self._on_write(db, list(inserted.values()))
+
+        db.commit()
+        return results
+
+    def promote(
+        self,
+        db: Session,
+        *,
+        from_school_year: SchoolYear,
+        to_school_year: SchoolYear,
+        overrides: Dict[int, PromotionAction] = None,
+        dry_run: bool = False
+    ) -> Dict[str, int]:
+        """
+        Move every registration of `from_school_year` into `to_school_year`.
 
-registeration = CRUDRegistration(Registration)
+        Students go up to the grade whose numeric value is one higher, or
+        graduate when there is none. `overrides` maps student ids to an
+        explicit action. Students already registered in the target year
+        are left alone. The whole move is one statement: the plan, the
+        counter upsert and the INSERT ... SELECT share its snapshot, so the
+        numbers reserved per grade always match the rows inserted. New
+        regi_nos are numbered per grade after the reserved counter range,
+        and `old_registration_id` points to the previous year.
+
+        Returns the number of students per outcome, and writes nothing
+        when `dry_run` is set.
+        """
+        plan = self._promotion_plan(
+            from_school_year, to_school_year, overrides or {}
+        )
+        outcome = case(
+            (plan.c.already_registered, 'already_registered'),
+            (plan.c.action == PromotionAction.hold_back.value, 'held_back'),
+            (plan.c.grade_id.is_(None), 'graduated'),
+            else_='promoted'
+        )
+        plan = select(plan, outcome.label('outcome')).cte('outcomes')
+        moving = plan.c.outcome.in_(['promoted', 'held_back'])
+
+        counts = {
+            'promoted': 0, 'held_back': 0, 'graduated': 0, 'already_registered': 0
+        }
+        if dry_run:
+            for row in db.execute(
+                select(plan.c.outcome, func.count().label('total'))
+                .group_by(plan.c.outcome)
+            ):
+                counts[row.outcome] += row.total
+            return counts
+
+        per_grade = select(
+            plan.c.grade_id, func.count().label('total')
+        ).where(moving).group_by(plan.c.grade_id).cte('per_grade')
+        # Upserted in grade order, like _bump_counters.
+        counter = insert(RegistrationCounter).from_select(
+            ['school_year_id', 'grade_id', 'last_value'],
+            select(
+                literal(to_school_year.id, BigInteger),
+                per_grade.c.grade_id,
+                per_grade.c.total,
+            ).order_by(per_grade.c.grade_id)
+        )
+        counters = counter.on_conflict_do_update(
+            index_elements=[
+                RegistrationCounter.school_year_id, RegistrationCounter.grade_id
+            ],
+            set_={
+                'last_value': RegistrationCounter.last_value + counter.excluded.last_value
+            }
+        ).returning(
+            RegistrationCounter.grade_id, RegistrationCounter.last_value
+        ).cte('counters')
+
+        target_grade = aliased(Grade)
+        sequence = cast(
+            counters.c.last_value - per_grade.c.total
+            + func.row_number().over(
+                partition_by=plan.c.grade_id,
+                order_by=(plan.c.regi_no, plan.c.student_id)
+            ),
+            String
+        )
+        regi_no = (
+            literal(self._school_year_prefix(to_school_year))
+            + cast(target_grade.numeric_value, String)
+            + '-'
+            + func.lpad(sequence, func.greatest(3, func.length(sequence)), '0')
+        )
+        # A student registered into the target year meanwhile keeps that
+        # registration, and counts as already registered.
+        inserted = insert(Registration).from_select(
+            ['regi_no', 'student_id', 'grade_id',
+                'school_year_id', 'old_registration_id'],
+            select(
+                regi_no,
+                plan.c.student_id,
+                plan.c.grade_id,
+                literal(to_school_year.id, BigInteger),
+                plan.c.registration_id,
+            )
+            .join(per_grade, per_grade.c.grade_id == plan.c.grade_id)
+            .join(counters, counters.c.grade_id == plan.c.grade_id)
+            .join(target_grade, target_grade.id == plan.c.grade_id)
+            .where(moving)
+        ).on_conflict_do_nothing(
+            index_elements=['student_id', 'school_year_id']
+        ).returning(Registration.student_id).cte('inserted')
+
+        moved = 0
+        for row in db.execute(
+            select(
+                plan.c.outcome,
+                func.count().label('total'),
+                func.count(inserted.c.student_id).label('inserted'),
+            )
+            .outerjoin(inserted, inserted.c.student_id == plan.c.student_id)
+            .group_by(plan.c.outcome)
+        ):
+            if row.outcome in ('promoted', 'held_back'):
+                counts[row.outcome] += row.inserted
+                counts['already_registered'] += row.total - row.inserted
+                moved += row.inserted
+            else:
+                counts[row.outcome] += row.total
+
+        if moved:
+            self._on_write(db, None)
+        db.commit()
+        return counts
+
+    def _promotion_plan(
+        self,
+        from_school_year: SchoolYear,
+        to_school_year: SchoolYear,
+        overrides: Dict[int, PromotionAction]
+    ):
+        """
+        One row per registration of `from_school_year` with the grade it
+        moves to (NULL when graduating) and the action that decided it.
+        """
+        next_grade = aliased(Grade)
+        current_grade = aliased(Grade)
+        next_grade_id = select(func.min(next_grade.id)).where(
+            next_grade.numeric_value == current_grade.numeric_value + 1
+        ).scalar_subquery()
+
+        stmt = select(
+            Registration.id.label('registration_id'),
+            Registration.student_id,
+            Registration.regi_no,
+        ).join(current_grade, current_grade.id == Registration.grade_id)
+
+        if overrides:
+            override = values(
+                column('student_id', BigInteger), column('action', String),
+                name='overrides'
+            ).data([
+                (student_id, PromotionAction(action).value)
+                for student_id, action in overrides.items()
+            ])
+            stmt = stmt.outerjoin(
+                override, override.c.student_id == Registration.student_id
+            )
+            action = func.coalesce(
+                override.c.action, PromotionAction.promote.value
+            )
+        else:
+            action = literal(PromotionAction.promote.value, String)
+
+        renewal = aliased(Registration)
+        already_registered = exists().where(
+            renewal.student_id == Registration.student_id,
+            renewal.school_year_id == to_school_year.id,
+        )
+        return stmt.add_columns(
+            action.label('action'),
+            case(
+                (action == PromotionAction.hold_back.value, Registration.grade_id),
+                (action == PromotionAction.graduate.value, None),
+                else_=next_grade_id
+            ).label('grade_id'),
+            already_registered.label('already_registered'),
+        ).where(
+            Registration.school_year_id == from_school_year.id
+        ).subquery('plan')
+
+    def regi_no_prefix(self, school_year: SchoolYear, grade: Grade) -> str:
+        # The separator keeps grade and sequence apart whatever their
+        # widths: grade 1 number 1005 and grade 11 number 5 would both
+        # render as ...11005 without it.
+        return f"{self._school_year_prefix(school_year)}{getattr(grade,'numeric_value')}-"
+
+    def _school_year_prefix(self, school_year: SchoolYear) -> str:
+        return f"{getattr(school_year,'start_date').strftime('%y')}{getattr(school_year,'end_date').strftime('%y')}"
+
+
+registeration = CRUDRegistration(
+    Registration,
+    load_options=[
+        joinedload(Registration.student).joinedload(Student.nationality),
+        joinedload(Registration.grade),
+        joinedload(Registration.school_year),
+    ]
+)
@@ -1,6 +1,6 @@
 from typing import Optional
 from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
+from app.crud.cached import CachedCRUDBase
 from app.db.base import SchoolYear
 from app.schemas import (
     SchoolYearCreate,
@@ -8,12 +8,12 @@ from app.schemas import (
 )
 
 
-class CRUDSchoolYear(CRUDBase[SchoolYear, SchoolYearCreate, SchoolYearUpdate]):
+class CRUDSchoolYear(CachedCRUDBase[SchoolYear, SchoolYearCreate, SchoolYearUpdate]):
     def get_by_name(self, db: Session, *, name: str) -> Optional[SchoolYear]:
-        return db.query(self.model).filter(self.model.title == name).first()
+        return self._find(db, lambda school_year: school_year.title == name)
 
     def get_current_school_year(self, db: Session) -> Optional[SchoolYear]:
-        return db.query(self.model).filter(self.model.is_active == True).first()
+        return self._find(db, lambda school_year: school_year.is_active)
 
     def acivate_school_year(self, db: Session, school_year_id: int) -> SchoolYear:
         db.query(self.model).filter(
@@ -25,6 +25,7 @@ class CRUDSchoolYear(CRUDBase[SchoolYear, SchoolYearCreate, SchoolYearUpdate]):
         school_year_query.update(
             {self.model.is_active: True}, synchronize_session=False)
 
+        self._on_write(db, None)
         db.commit()
         return school_year_query.first()
 
@@ -1,14 +1,399 @@
-from typing import Optional
-from sqlalchemy.orm import Session
+import csv
+import io
+from datetime import date
+from itertools import islice
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+from pydantic import ValidationError
+from sqlalchemy import (
+    Date,
+    String,
+    and_,
+    bindparam,
+    func,
+    literal_column,
+    or_,
+    select,
+    tuple_,
+    union,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.sql import Select
+from app.core.arabic import name_block_key, name_similarity
+from app.core.config import settings
 from app.crud.base import CRUDBase
+from app.crud.crud_nationality import nationality as crud_nationality
+from app.crud.filters import FilterSpec
 from app.db.base import Student
 from app.schemas import (
     StudentCreate,
     StudentUpdate,
 )
 
+# Columns loaded by import_rows, in COPY order.
+IMPORT_COLUMNS = (
+    'first_name',
+    'father_name',
+    'gfather_name',
+    'last_name',
+    'gender',
+    'date_of_birth',
+    'guardian_phone_no',
+    'nationality_id',
+)
+
+_SPACE = literal_column("' '")
+# Normalized full name, the same expression as ix_students_full_name_trgm so
+# that searches use the index.
+FULL_NAME = func.normalize_arabic(
+    Student.first_name + _SPACE + Student.father_name + _SPACE
+    + Student.gfather_name + _SPACE + Student.last_name
+)
+
+
+def blocking_keys(
+    date_of_birth: date, name_key: str, guardian_phone_no: str
+) -> Tuple[tuple, tuple]:
+    # Students sharing either key may be duplicates: same birth date and
+    # either the same normalized name or the same guardian phone. Those only
+    # sharing the phone must also have similar first names, see
+    # similar_first_names.
+    return (
+        ('name', date_of_birth, name_key),
+        ('phone', date_of_birth, guardian_phone_no),
+    )
+
+
+def _student_blocking_keys(student: StudentCreate) -> Tuple[tuple, tuple]:
+    return blocking_keys(
+        student.date_of_birth,
+        name_block_key(student.first_name, student.last_name),
+        student.guardian_phone_no
+    )
+
+
+def similar_first_names(first_name: str, other_first_name: str) -> bool:
+    # Siblings share their guardian's phone, and twins their birth date too:
+    # it takes similar first names for the phone key to make a match.
+    return name_similarity(
+        first_name, other_first_name
+    ) >= settings.DUPLICATE_NAME_SIMILARITY
+
+
+def _block_duplicate(
+    blocks: Dict[tuple, List[Tuple[int, str]]],
+    keys: Tuple[tuple, tuple],
+    first_name: str,
+) -> Optional[int]:
+    # The first member of `blocks`, lists of ids and first names by
+    # blocking key, that a student with `keys` and `first_name` duplicates.
+    name_key, phone_key = keys
+    if name_key in blocks:
+        return blocks[name_key][0][0]
+    for id, other_first_name in blocks.get(phone_key, ()):
+        if similar_first_names(first_name, other_first_name):
+            return id
+    return None
+
+
 class CRUDStudent(CRUDBase[Student, StudentCreate, StudentUpdate]):
-    pass
+    async def search_async(
+        self, db: AsyncSession, q: str, *, limit: int = 20
+    ) -> List[Student]:
+        """
+        Students whose full name contains words similar to `q`, an already
+        normalized query, best matches first.
+        """
+        stmt = select(self.model).options(*self.load_options).where(
+            # full_name %> q, i.e. q <% full_name, is served by the trigram
+            # index: word_similarity(q, full_name) above the threshold.
+            FULL_NAME.op('%>')(q)
+        ).order_by(
+            func.word_similarity(q, FULL_NAME).desc(), self.model.id
+        ).limit(limit)
+        return (await db.execute(stmt)).scalars().all()
 
+    def find_duplicates(
+        self, db: Session, obj_in: StudentCreate, *, limit: int = 10
+    ) -> List[int]:
+        """
+        Ids of the students that may be duplicates of `obj_in`, found
+        through the blocking key indexes.
+        """
+        name_key = name_block_key(obj_in.first_name, obj_in.last_name)
+        stmt = select(
+            self.model.id, self.model.first_name, self.model.name_block_key
+        ).where(
+            self.model.date_of_birth == obj_in.date_of_birth,
+            or_(
+                self.model.name_block_key == name_key,
+                self.model.guardian_phone_no == obj_in.guardian_phone_no,
+            )
+        ).order_by(self.model.id)
+        return [
+            row.id for row in db.execute(stmt)
+            if row.name_block_key == name_key
+            or similar_first_names(obj_in.first_name, row.first_name)
+        ][:limit]
 
-student = CRUDStudent(Student)
+    def _existing_blocks(
+        self, db: Session, keys: List[Tuple[tuple, tuple]]
+    ) -> Dict[tuple, List[Tuple[int, str]]]:
+        # Blocking keys of the stored students that share one of `keys`,
+        # each mapped to the ids and first names of those students, in id
+        # order.
+        name_keys, phone_keys = set(), set()
+        for name_key, phone_key in keys:
+            name_keys.add(name_key[1:])
+            phone_keys.add(phone_key[1:])
+        # Each key set is sent as two arrays and joined through the blocking
+        # key indexes: a row-value IN list of thousands of keys is planned
+        # and matched far more slowly.
+        stmt = union(
+            self._blocks_matching(self.model.name_block_key, name_keys),
+            self._blocks_matching(self.model.guardian_phone_no, phone_keys),
+        )
+        blocks = {}
+        for row in sorted(db.execute(stmt)):
+            for key in blocking_keys(*row[2:]):
+                blocks.setdefault(key, []).append((row.id, row.first_name))
+        return blocks
+
+    def _blocks_matching(self, column: Any, keys: Set[tuple]) -> Select:
+        dates, values = zip(*keys)
+        matched = func.unnest(
+            bindparam(None, list(dates), type_=ARRAY(Date)),
+            bindparam(None, list(values), type_=ARRAY(String)),
+        ).table_valued('date_of_birth', 'value').render_derived()
+        return select(
+            self.model.id,
+            self.model.first_name,
+            self.model.date_of_birth,
+            self.model.name_block_key,
+            self.model.guardian_phone_no,
+        ).join(matched, and_(
+            self.model.date_of_birth == matched.c.date_of_birth,
+            column == matched.c.value,
+        ))
+
+    async def duplicate_clusters_async(
+        self, db: AsyncSession, *, batch_size: int = 10000
+    ) -> List[List[int]]:
+        """
+        Group the stored students into clusters of duplicate candidates,
+        linking students that share the name key, or the phone key and a
+        similar first name, transitively.
+
+        Only the students in a block of two or more are fetched, from a
+        hash aggregate over each key, then clustered with a union-find, so
+        the scan stays near-linear in the number of students. Names are
+        compared pairwise within a phone block, a family at most.
+        """
+        model = self.model
+        shared_name = select(
+            model.date_of_birth, model.name_block_key
+        ).group_by(
+            model.date_of_birth, model.name_block_key
+        ).having(func.count() > 1)
+        shared_phone = select(
+            model.date_of_birth, model.guardian_phone_no
+        ).group_by(
+            model.date_of_birth, model.guardian_phone_no
+        ).having(func.count() > 1)
+        stmt = select(
+            model.id,
+            model.first_name,
+            model.date_of_birth,
+            model.name_block_key,
+            model.guardian_phone_no,
+        ).where(or_(
+            tuple_(model.date_of_birth, model.name_block_key).in_(
+                shared_name
+            ),
+            tuple_(model.date_of_birth, model.guardian_phone_no).in_(
+                shared_phone
+            ),
+        )).order_by(model.id)
+
+        parent = {}
+
+        def find(id: int) -> int:
+            while parent[id] != id:
+                # Path halving keeps the trees flat.
+                parent[id] = parent[parent[id]]
+                id = parent[id]
+            return id
+
+        def union(id: int, other_id: int) -> None:
+            # The lower root becomes the parent, so that every root is the
+            # lowest id of its cluster.
+            root, other_root = sorted((find(id), find(other_id)))
+            parent[other_root] = root
+
+        blocks = {}
+        result = await db.stream(stmt)
+        async for rows in result.partitions(batch_size):
+            for row in rows:
+                parent[row.id] = row.id
+                name_key, phone_key = blocking_keys(*row[2:])
+                if name_key in blocks:
+                    union(row.id, blocks[name_key][0][0])
+                for id, first_name in blocks.get(phone_key, ()):
+                    if similar_first_names(row.first_name, first_name):
+                        union(row.id, id)
+                for key in (name_key, phone_key):
+                    blocks.setdefault(key, []).append(
+                        (row.id, row.first_name)
+                    )
+
+        clusters = {}
+        for id in parent:
+            clusters.setdefault(find(id), []).append(id)
+        return [ids for ids in clusters.values() if len(ids) > 1]
+
+    def import_rows(
+        self,
+        db: Session,
+        rows: Iterable[Any],
+        *,
+        allow_duplicates: bool = False,
+        batch_size: int = 5000
+    ) -> Dict[str, Any]:
+        """
+        Validate `rows` with StudentCreate and load the valid ones with
+        Postgres COPY, `batch_size` rows at a time, in one transaction.
+
+        A row may give either form of its nationality's name in `nationality`
+        instead of giving `nationality_id`; all names are resolved from the
+        nationality cache. Invalid rows are skipped and reported with their
+        1-based position, as are the duplicate candidates of a stored
+        student or an earlier row, unless `allow_duplicates` is set.
+        """
+        nationality_ids = crud_nationality.get_ids_by_name(db)
+        known_ids = set(nationality_ids.values())
+        cursor = db.connection().connection.cursor()
+        copy_sql = (
+            f"COPY {self.model.__tablename__} ({', '.join(IMPORT_COLUMNS)}) "
+            f"FROM STDIN WITH (FORMAT csv)"
+        )
+        imported = 0
+        errors = []
+        # Blocking keys of the rows imported so far, to their row numbers
+        # and first names.
+        imported_blocks = {}
+        numbered = enumerate(rows, start=1)
+        while True:
+            batch = list(islice(numbered, batch_size))
+            if not batch:
+                break
+            students = []
+            for number, row in batch:
+                student, row_errors = self._validate_import_row(
+                    row, nationality_ids, known_ids
+                )
+                if row_errors:
+                    errors.append({'row': number, 'errors': row_errors})
+                else:
+                    students.append(
+                        (number, student, _student_blocking_keys(student))
+                    )
+            if students and not allow_duplicates:
+                # One lookup per batch, before this batch is copied.
+                stored_blocks = self._existing_blocks(
+                    db, [keys for _, _, keys in students]
+                )
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            batch_imported = 0
+            for number, student, keys in students:
+                if not allow_duplicates:
+                    duplicate = self._import_duplicate(
+                        student, keys, number, stored_blocks, imported_blocks
+                    )
+                    if duplicate:
+                        errors.append({'row': number, 'errors': [duplicate]})
+                        continue
+                writer.writerow(
+                    [getattr(student, column) for column in IMPORT_COLUMNS]
+                )
+                batch_imported += 1
+            if batch_imported:
+                buffer.seek(0)
+                cursor.copy_expert(copy_sql, buffer)
+                imported += batch_imported
+        if imported:
+            self._on_write(db, None)
+        errors.sort(key=lambda error: error['row'])
+        db.commit()
+        return {'imported': imported, 'errors': errors}
+
+    @staticmethod
+    def _import_duplicate(
+        student: StudentCreate,
+        keys: Tuple[tuple, tuple],
+        number: int,
+        stored_blocks: Dict[tuple, List[Tuple[int, str]]],
+        imported_blocks: Dict[tuple, List[Tuple[int, str]]],
+    ) -> Optional[str]:
+        row = _block_duplicate(imported_blocks, keys, student.first_name)
+        if row is not None:
+            return f'Possible duplicate of row {row}.'
+        id = _block_duplicate(stored_blocks, keys, student.first_name)
+        if id is not None:
+            return f'Possible duplicate of student {id}.'
+        for key in keys:
+            imported_blocks.setdefault(key, []).append(
+                (number, student.first_name)
+            )
+        return None
+
+    @staticmethod
+    def _validate_import_row(
+        row: Any, nationality_ids: Dict[str, int], known_ids: Set[int]
+    ) -> Tuple[Optional[StudentCreate], List[str]]:
+        if not isinstance(row, dict):
+            return None, ['Row is not an object.']
+        row = dict(row)
+        nationality = row.pop('nationality', None)
+        if not row.get('nationality_id') and nationality:
+            row['nationality_id'] = nationality_ids.get(str(nationality).strip())
+            if row['nationality_id'] is None:
+                return None, [f'Nationality {nationality} does not exist.']
+        try:
+            student = StudentCreate.parse_obj(row)
+        except ValidationError as exc:
+            return None, [
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                for error in exc.errors()
+            ]
+        if student.nationality_id not in known_ids:
+            return None, [
+                f'Nationality with id {student.nationality_id} not found.'
+            ]
+        return student, []
+
+
+student = CRUDStudent(
+    Student,
+    load_options=[joinedload(Student.nationality)],
+    filter_spec=FilterSpec(
+        Student,
+        fields={
+            'nationality_id': ('eq', 'in'),
+            'gender': ('eq',),
+            'date_of_birth': ('eq', 'gte', 'lte'),
+            'first_name': ('eq', 'prefix'),
+            'last_name': ('eq', 'prefix'),
+        },
+        order_by=('id', 'date_of_birth', 'first_name', 'last_name'),
+    )
+)
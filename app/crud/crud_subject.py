@@ -1,15 +1,27 @@
-from typing import Optional
+from typing import Any, Optional
+from sqlalchemy import delete
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
-from app.db.base import Subject
+from app.crud.cached import CachedCRUDBase
+from app.db.invalidation import publish
+from app.db.base import (
+    Subject,
+    GradeSubject,
+)
 from app.schemas import (
     SubjectCreate,
     SubjectUpdate,
 )
 
-class CRUDSubject(CRUDBase[Subject, SubjectCreate, SubjectUpdate]):
+class CRUDSubject(CachedCRUDBase[Subject, SubjectCreate, SubjectUpdate]):
     def get_by_name(self, db: Session, *, name: str) -> Optional[Subject]:
-        return db.query(self.model).filter(self.model.name == name).first()
+        return self._find(db, lambda subject: subject.name == name)
+
+    def remove_by_id(self, db: Session, *, id: Any) -> Optional[Row]:
+        # Unassign the subject from every grade, like the ORM cascade does.
+        db.execute(delete(GradeSubject).where(GradeSubject.subject_id == id))
+        publish(db, GradeSubject.__tablename__)
+        return super().remove_by_id(db, id=id)
 
 
 subject = CRUDSubject(Subject)
@@ -0,0 +1,233 @@
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, ValidationError, create_model, parse_obj_as
+from sqlalchemy import tuple_
+from app.db.base import Base
+
+OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    'eq': lambda column, value: column == value,
+    'in': lambda column, values: column.in_(values),
+    'gte': lambda column, value: column >= value,
+    'lte': lambda column, value: column <= value,
+    'prefix': lambda column, value: column.startswith(value, autoescape=True),
+}
+
+
+class FilterError(ValueError):
+    """
+    A list request's filters, order or fields don't match the model's spec.
+    """
+
+
+class FilterSpec:
+    """
+    What a list endpoint may filter and sort `model` by.
+
+    `fields` maps column names to their allowed operators, see OPERATORS.
+    They are given in the query as `name=value` for `eq` and
+    `name__op=value` otherwise, `in` taking comma-separated values.
+    `order_by` lists the columns allowed in `order_by=name` or
+    `order_by=-name`, which must not be nullable: pages are seeked past
+    the last (value, id) pair.
+    """
+
+    def __init__(
+        self,
+        model: Type[Base],
+        *,
+        fields: Dict[str, Sequence[str]],
+        order_by: Sequence[str] = ('id',)
+    ) -> None:
+        for name, operators in fields.items():
+            unknown = set(operators) - set(OPERATORS)
+            if unknown:
+                raise ValueError(f'Unknown operators for {name}: {unknown}')
+        self.model = model
+        self.fields = {name: tuple(ops) for name, ops in fields.items()}
+        self.order_by = tuple(order_by)
+
+    def parse(
+        self,
+        query: Dict[str, str],
+        *,
+        order_by: Optional[str] = None,
+        fields: Optional[str] = None
+    ) -> 'Filters':
+        """
+        Parse the filters found among the `query` parameters, ignoring the
+        unrelated ones, along with `order_by` and `fields`.
+        """
+        keys = tuple(sorted(key for key in query if self._is_filter(key)))
+        clauses = [
+            build(coerce(query[key]))
+            for key, coerce, build in compile_filters(self, keys)
+        ]
+        return Filters(
+            clauses,
+            compile_order(self, order_by) if order_by else None,
+            tuple(sorted({
+                name.strip() for name in fields.split(',') if name.strip()
+            })) if fields else None,
+        )
+
+    def _is_filter(self, key: str) -> bool:
+        # Unknown operators of known fields and unknown `__` filters are
+        # parsed so that they are rejected, rather than silently ignored.
+        return key.split('__', 1)[0] in self.fields or '__' in key
+
+
+def _coercer(key: str, python_type: type, many: bool) -> Callable:
+    def coerce(raw: str) -> Any:
+        try:
+            if many:
+                return parse_obj_as(List[python_type], raw.split(','))
+            return parse_obj_as(python_type, raw)
+        except ValidationError:
+            raise FilterError(f'Invalid value for filter {key}.')
+    return coerce
+
+
+@lru_cache(maxsize=1024)
+def compile_filters(
+    spec: FilterSpec, keys: Tuple[str, ...]
+) -> List[Tuple[str, Callable, Callable]]:
+    """
+    The parse plan of the filter parameters `keys`: for each one, how to
+    coerce its raw value and build its where clause. Cached, as clients
+    keep sending the same combinations.
+    """
+    plan = []
+    for key in keys:
+        name, _, operator = key.partition('__')
+        operator = operator or 'eq'
+        if operator not in spec.fields.get(name, ()):
+            raise FilterError(f'Unsupported filter {key}.')
+        column = getattr(spec.model, name)
+        build = OPERATORS[operator]
+        plan.append((
+            key,
+            _coercer(key, column.type.python_type, operator == 'in'),
+            lambda value, column=column, build=build: build(column, value),
+        ))
+    return plan
+
+
+class Order:
+    """
+    Sort order of a list: one column then the primary key, both ascending
+    or both descending, so pages can be seeked with a row comparison.
+    """
+
+    def __init__(self, model: Type[Base], name: str, descending: bool):
+        self.name = name
+        self.descending = descending
+        self.columns = [getattr(model, name)]
+        if name != 'id':
+            self.columns.append(model.id)
+        self._python_type = self.columns[0].type.python_type
+
+    def clauses(self) -> List[Any]:
+        if self.descending:
+            return [column.desc() for column in self.columns]
+        return list(self.columns)
+
+    def seek(self, after: Any) -> Any:
+        """
+        Where clause skipping the rows up to the cursor `after`, an id, or
+        a (value, id) pair when sorting by another column.
+        """
+        if len(self.columns) == 1:
+            if isinstance(after, (list, tuple)):
+                raise FilterError('Pagination cursor does not match order_by.')
+            values = (after,)
+        else:
+            if not isinstance(after, (list, tuple)) or len(after) != 2:
+                raise FilterError('Pagination cursor does not match order_by.')
+            try:
+                values = (parse_obj_as(self._python_type, after[0]), after[1])
+            except ValidationError:
+                raise FilterError('Invalid pagination cursor.')
+        bound = tuple_(*self.columns)
+        if self.descending:
+            return bound < tuple_(*values)
+        return bound > tuple_(*values)
+
+    def cursor_key(self, item: Any) -> Optional[Any]:
+        """
+        Sort value of the last item of a page, for its cursor. None when
+        sorting by id, the cursor then only holds the id.
+        """
+        if len(self.columns) == 1:
+            return None
+        value = item[self.name] if isinstance(item, dict) else getattr(
+            item, self.name
+        )
+        return jsonable_encoder(value)
+
+
+@lru_cache(maxsize=256)
+def compile_order(spec: FilterSpec, order_by: str) -> Order:
+    name = order_by.lstrip('-')
+    if name not in spec.order_by:
+        raise FilterError(f'Cannot order by {name}.')
+    return Order(spec.model, name, order_by.startswith('-'))
+
+
+class Filters:
+    """
+    Parsed filters of a list request: where clauses, sort order, and the
+    sparse fieldset to render, if any.
+    """
+
+    def __init__(
+        self,
+        clauses: List[Any],
+        order: Optional[Order],
+        fields: Optional[Tuple[str, ...]],
+    ) -> None:
+        self.clauses = clauses
+        self.order = order
+        self.fields = fields
+
+    def schema(self, schema: Type[BaseModel]) -> Type[BaseModel]:
+        """
+        `schema` reduced to the requested fields, or as is without a
+        sparse fieldset.
+        """
+        if not self.fields:
+            return schema
+        sort_field = self.order.name if self.order else 'id'
+        return sparse_schema(schema, self.fields, sort_field)
+
+
+@lru_cache(maxsize=256)
+def sparse_schema(
+    schema: Type[BaseModel], fields: Tuple[str, ...], sort_field: str
+) -> Type[BaseModel]:
+    """
+    Subset of `schema` with `fields`, in the schema's field order. The id
+    and the sort field are always kept, the next page cursor needs them.
+    Cached, so its projection is compiled once too.
+    """
+    unknown = set(fields) - set(schema.__fields__)
+    if unknown:
+        raise FilterError(f"Unknown fields: {', '.join(sorted(unknown))}.")
+    kept = set(fields) | {'id', sort_field}
+    return create_model(
+        f'{schema.__name__}Fields',
+        __base__=BaseModel,
+        **{
+            name: (field.outer_type_, ... if field.required else field.default)
+            for name, field in schema.__fields__.items() if name in kept
+        }
+    )
@@ -0,0 +1,127 @@
+from functools import lru_cache
+from operator import itemgetter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Tuple,
+    Type,
+)
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_SINGLETON
+from sqlalchemy import (
+    case,
+    func,
+    inspect,
+    literal_column,
+    null,
+    select,
+)
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import Select
+from app.db.base import Base
+
+
+class Projection:
+    """
+    The columns a response schema needs from `model` and its related
+    tables, and how to turn the resulting rows into the schema's dicts.
+
+    Scalar fields map to the columns of the same name, nested schema fields
+    to the relationships of the same name, which are joined.  Dicts keep
+    the schema's field order, so encoding them gives the same JSON as the
+    validated schema would, without loading ORM objects.  Values are passed
+    through as stored; the schemas' validators already ran when they were
+    written.
+
+    `json_object` is the same document as a `json_build_object` expression,
+    for rendering it in the database instead.
+    """
+
+    def __init__(self, model: Type[Base], schema: Type[BaseModel]) -> None:
+        self.model = model
+        self.columns: List[Any] = []
+        self._indexes: Dict[Tuple[Any, str], int] = {}
+        self.joins: List[Tuple[Any, bool]] = []
+        self.build, self.json_object = self._compile(model, schema)
+
+    def select(self, *columns: Any) -> Select:
+        """
+        Select `columns`, by default the projected ones, from the model and
+        the joined tables.
+        """
+        stmt = select(*(columns or self.columns)).select_from(self.model)
+        for target, isouter in self.joins:
+            stmt = stmt.join(target, isouter=isouter)
+        return stmt
+
+    def _add_column(self, entity: Any, key: str) -> int:
+        # Each column is selected once, e.g. a joined table's primary key
+        # and its `id` field.
+        if (entity, key) not in self._indexes:
+            self._indexes[entity, key] = len(self.columns)
+            self.columns.append(
+                getattr(entity, key).label(f'c{len(self.columns)}')
+            )
+        return self._indexes[entity, key]
+
+    def _compile(
+        self, entity: Any, schema: Type[BaseModel]
+    ) -> Tuple[Callable[[Any], Dict[str, Any]], Any]:
+        names, getters, json_args = [], [], []
+        for name, field in schema.__fields__.items():
+            if isinstance(field.outer_type_, type) and issubclass(
+                field.outer_type_, BaseModel
+            ):
+                relationship = inspect(entity).mapper.relationships[name]
+                target = aliased(relationship.mapper.class_)
+                optional = field.allow_none or any(
+                    column.nullable for column in relationship.local_columns
+                )
+                self.joins.append(
+                    (getattr(entity, name).of_type(target), optional)
+                )
+                mapper = relationship.mapper
+                key = self._add_column(
+                    target,
+                    mapper.get_property_by_column(mapper.primary_key[0]).key
+                )
+                build, json_object = self._compile(target, field.outer_type_)
+                getters.append(self._nested(build, key))
+                if optional:
+                    primary_key = self.columns[key].element
+                    json_object = case(
+                        (primary_key.is_(None), null()), else_=json_object
+                    )
+                json_args += [literal_column(f"'{name}'"), json_object]
+            elif field.shape == SHAPE_SINGLETON:
+                getters.append(itemgetter(self._add_column(entity, name)))
+                json_args += [
+                    literal_column(f"'{name}'"), getattr(entity, name)
+                ]
+            else:
+                raise ValueError(
+                    f'Cannot project {schema.__name__}.{name}: only scalar '
+                    f'and nested schema fields are supported.'
+                )
+            names.append(name)
+
+        def build(row) -> Dict[str, Any]:
+            return dict(zip(names, [getter(row) for getter in getters]))
+        return build, func.json_build_object(*json_args)
+
+    @staticmethod
+    def _nested(build: Callable, key: int) -> Callable:
+        def get(row) -> Any:
+            return None if row[key] is None else build(row)
+        return get
+
+
+# Sparse fieldset schemas are created anew once evicted from their own
+# cache, so this one must be bounded too.
+@lru_cache(maxsize=512)
+def compile_projection(
+    model: Type[Base], schema: Type[BaseModel]
+) -> Projection:
+    return Projection(model, schema)
@@ -0,0 +1,106 @@
+from typing import Any, List, Optional, Sequence, Type
+import orjson
+from sqlalchemy import BigInteger, func, literal_column, null, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from app.core.config import settings
+from app.db.base import Base
+from app.schemas import CountMode
+
+# Renders `:name` placeholders, re-bound by text() for any driver.
+_EXPLAIN_DIALECT = postgresql.dialect(paramstyle='named')
+
+
+def _count(stmt: Select) -> Any:
+    return select(func.count()).select_from(stmt.subquery()).scalar_subquery()
+
+
+def _reltuples(model: Type[Base]) -> Any:
+    # Row count kept by VACUUM and ANALYZE, -1 when never computed.
+    return literal_column(
+        f"(SELECT reltuples::bigint FROM pg_class "
+        f"WHERE oid = '{model.__tablename__}'::regclass)",
+        BigInteger
+    )
+
+
+async def explain_rows(db: AsyncSession, stmt: Select) -> int:
+    """
+    The planner's estimate of the number of rows `stmt` returns.
+    """
+    compiled = stmt.compile(
+        dialect=_EXPLAIN_DIALECT,
+        compile_kwargs={'render_postcompile': True}
+    )
+    plan = (await db.execute(
+        text(f'EXPLAIN (FORMAT JSON) {compiled}'), compiled.params
+    )).scalar()
+    if isinstance(plan, (str, bytes)):
+        plan = orjson.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class TotalCount:
+    """
+    Total number of rows matching a list request, in `value`, with
+    `estimated` set when it comes from the planner.
+
+    The get_multi methods select it with their page, through the extra
+    `columns`, then `resolve` it from the page's last row: it costs no
+    round trip of its own, except for an EXPLAIN when a large filtered set
+    is estimated, or a separate query when the page is empty.
+    """
+
+    def __init__(self, mode: CountMode) -> None:
+        self.mode = mode
+        self.value: Optional[int] = None
+        self.estimated = False
+        self._matching: Optional[Select] = None
+        self._model: Optional[Type[Base]] = None
+
+    def columns(self, model: Type[Base], matching: Select) -> List[Any]:
+        """
+        Columns to add to the page query, for the ids of `model` selected
+        by `matching`.
+        """
+        self._model, self._matching = model, matching
+        filtered = matching.whereclause is not None
+        if self.mode is CountMode.exact:
+            count = _count(matching)
+        elif self.mode is CountMode.auto:
+            # Stops counting past the limit: small sets are counted
+            # exactly, the cost of large ones stays bounded.
+            count = _count(matching.limit(settings.EXACT_COUNT_LIMIT + 1))
+        else:
+            count = null()
+        if self.mode is CountMode.exact or filtered:
+            estimate = null()
+        else:
+            estimate = _reltuples(model)
+        return [count.label('total_count'), estimate.label('total_estimate')]
+
+    async def resolve(
+        self, db: AsyncSession, rows: Sequence[Any]
+    ) -> None:
+        """
+        Read the total from the last row of the page, `rows`, the page
+        query having selected `columns` last.
+        """
+        if rows:
+            count, estimate = rows[-1][-2:]
+        else:
+            count, estimate = (await db.execute(
+                select(*self.columns(self._model, self._matching))
+            )).one()
+        if self.mode is CountMode.exact or (
+            self.mode is CountMode.auto
+            and count <= settings.EXACT_COUNT_LIMIT
+        ):
+            self.value = count
+            return
+        if estimate is None or estimate < 0:
+            estimate = await explain_rows(db, self._matching)
+        # Never below what was counted, estimates can be stale.
+        self.value = max(estimate, count or 0)
+        self.estimated = True
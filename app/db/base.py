@@ -8,4 +8,6 @@ from app.models.school_year import SchoolYear  # noqa
 from app.models.student import Student  # noqa
 from app.models.grade_subject import GradeSubject  # noqa
 from app.models.registration import Registration  # noqa
-from app.models.nationality import Nationality  # noqa
\ No newline at end of file
+from app.models.nationality import Nationality  # noqa
+from app.models.registration_counter import RegistrationCounter  # noqa
+from app.models.table_version import TableVersion  # noqa
\ No newline at end of file
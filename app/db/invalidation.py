@@ -0,0 +1,128 @@
+import json
+import logging
+import select
+import threading
+import uuid
+from typing import Any, Callable, Iterable, List, Optional
+from sqlalchemy import event, func
+from sqlalchemy import select as sql_select
+from sqlalchemy.orm import Session
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'sms_invalidate'
+# Longer id lists are sent as "any row": a NOTIFY payload must stay under
+# 8000 bytes, or the statement fails and the write with it.
+MAX_NOTIFY_IDS = 100
+# Tells this process's own notifications apart from other workers'.
+_ORIGIN = uuid.uuid4().hex
+
+# Called with (table, ids) after a write commits, here or in another worker.
+# table None means anything may have changed, e.g. after a reconnect.
+Subscriber = Callable[[Optional[str], Optional[List[Any]]], None]
+_subscribers: List[Subscriber] = []
+
+
+def subscribe(callback: Subscriber) -> None:
+    _subscribers.append(callback)
+
+
+def _dispatch(table: Optional[str], ids: Optional[List[Any]]) -> None:
+    for callback in _subscribers:
+        try:
+            callback(table, ids)
+        except Exception:
+            logger.exception('Invalidation subscriber failed')
+
+
+def publish(
+    db: Session, table: str, ids: Optional[Iterable[Any]] = None
+) -> None:
+    """
+    Announce a write to `table` (and optionally which ids) made in the
+    current transaction of `db`.  Other workers are told through
+    `pg_notify`, which Postgres only delivers if the transaction commits,
+    about any row when more than MAX_NOTIFY_IDS were written; this
+    worker's subscribers run once the session commits or rolls back.
+    """
+    ids = list(ids) if ids is not None else None
+    db.info.setdefault('pending_invalidations', []).append((table, ids))
+    if db.get_bind().dialect.name == 'postgresql':
+        if ids is not None and len(ids) > MAX_NOTIFY_IDS:
+            ids = None
+        payload = json.dumps(
+            {'origin': _ORIGIN, 'table': table, 'ids': ids}, default=str
+        )
+        db.execute(sql_select(func.pg_notify(CHANNEL, payload)))
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _dispatch_pending(session: Session) -> None:
+    # Rolled back writes are dispatched too: a cache may have been filled
+    # from the uncommitted rows in the meantime.
+    for table, ids in session.info.pop('pending_invalidations', []):
+        _dispatch(table, ids)
+
+
+class _Listener(threading.Thread):
+    """
+    Background thread LISTENing on its own connection for the invalidations
+    published by other workers.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(name='invalidation-listener', daemon=True)
+        self.stopping = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopping.is_set():
+            try:
+                self._listen()
+            except Exception:
+                logger.exception('Invalidation listener lost its connection')
+                self.stopping.wait(5)
+
+    def _listen(self) -> None:
+        fairy = engine.raw_connection()
+        # Keep the connection for good, outside the pool's accounting.
+        fairy.detach()
+        connection = fairy.connection
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f'LISTEN {CHANNEL}')
+            # Notifications may have been missed while disconnected.
+            _dispatch(None, None)
+            while not self.stopping.is_set():
+                if not select.select([connection], [], [], 5)[0]:
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    self._handle(connection.notifies.pop(0).payload)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _handle(payload: str) -> None:
+        message = json.loads(payload)
+        if message.get('origin') != _ORIGIN:
+            _dispatch(message.get('table'), message.get('ids'))
+
+
+_listener: Optional[_Listener] = None
+
+
+def start_listener() -> None:
+    global _listener
+    if _listener is None and engine.dialect.name == 'postgresql':
+        _listener = _Listener()
+        _listener.start()
+
+
+def stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stopping.set()
+        _listener = None
@@ -0,0 +1,92 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds, in milliseconds, of the checkout wait histogram buckets.
+CHECKOUT_WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class CheckoutWaitHistogram:
+    """
+    Thread-safe histogram of how long pool checkouts waited for a connection.
+    """
+
+    def __init__(self, buckets: Sequence[float] = CHECKOUT_WAIT_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._total = 0
+        self._sum_ms = 0.0
+        self._timeouts = 0
+
+    def observe(self, waited_ms: float, timed_out: bool = False) -> None:
+        index = next(
+            (i for i, bound in enumerate(self.buckets) if waited_ms <= bound),
+            len(self.buckets)
+        )
+        with self._lock:
+            self._counts[index] += 1
+            self._total += 1
+            self._sum_ms += waited_ms
+            if timed_out:
+                self._timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = list(self._counts)
+            total, sum_ms, timeouts = self._total, self._sum_ms, self._timeouts
+        bounds: List[Optional[float]] = [*self.buckets, None]
+        return {
+            'count': total,
+            'sum_ms': round(sum_ms, 3),
+            'timeouts': timeouts,
+            'buckets': [
+                {'le_ms': bound, 'count': count}
+                for bound, count in zip(bounds, counts)
+            ],
+        }
+
+
+class _TimedCheckoutMixin:
+    checkout_wait: CheckoutWaitHistogram
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_wait = CheckoutWaitHistogram()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.checkout_wait.observe(
+                (time.perf_counter() - start) * 1000, timed_out
+            )
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(pool: QueuePool) -> Dict[str, Any]:
+    status = {
+        'size': pool.size(),
+        'checked_out': pool.checkedout(),
+        'idle': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0),
+        'max_overflow': pool._max_overflow,
+    }
+    histogram = getattr(pool, 'checkout_wait', None)
+    if histogram is not None:
+        status['checkout_wait'] = histogram.snapshot()
+    return status
@@ -0,0 +1,67 @@
+import itertools
+import time
+from typing import Dict, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, ReplicaSessionLocals
+
+# Cookie carrying the unix time until which a client reads from the primary.
+PRIMARY_PIN_COOKIE = "sms_primary_until"
+
+# Zero when the replica has replayed everything it received, otherwise the
+# age of the last replayed transaction.  NULL on a server not in recovery.
+REPLICA_LAG_SQL = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN NULL"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())"
+    " END"
+)
+
+_rotation = itertools.cycle(range(len(ReplicaSessionLocals)))
+# replica index -> (checked at, healthy)
+_health: Dict[int, tuple] = {}
+
+
+async def _is_healthy(index: int) -> bool:
+    checked_at, healthy = _health.get(index, (None, False))
+    now = time.monotonic()
+    if checked_at is not None and (
+        now - checked_at < settings.DB_REPLICA_LAG_CHECK_INTERVAL
+    ):
+        return healthy
+    try:
+        async with ReplicaSessionLocals[index]() as db:
+            lag = (await db.execute(REPLICA_LAG_SQL)).scalar()
+        healthy = lag is not None and lag <= settings.DB_REPLICA_MAX_LAG
+    except Exception:
+        healthy = False
+    _health[index] = (now, healthy)
+    return healthy
+
+
+def is_pinned_to_primary(pinned_until: Optional[str]) -> bool:
+    try:
+        return float(pinned_until) > time.time()
+    except (TypeError, ValueError):
+        return False
+
+
+async def read_sessionmaker(pinned_until: Optional[str] = None) -> sessionmaker:
+    """
+    Pick the session factory for a read-only request: the next healthy
+    replica in round-robin order, or the primary when the client is pinned
+    to it after a write or when no replica is within the allowed lag.
+    """
+    if not ReplicaSessionLocals or is_pinned_to_primary(pinned_until):
+        return AsyncSessionLocal
+    for _ in range(len(ReplicaSessionLocals)):
+        index = next(_rotation)
+        if await _is_healthy(index):
+            return ReplicaSessionLocals[index]
+    return AsyncSessionLocal
+
+
+def primary_pin_expiry() -> float:
+    return time.time() + settings.DB_READ_YOUR_WRITES_SECONDS
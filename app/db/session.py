@@ -1,6 +1,87 @@
+import asyncio
+from typing import Any, Dict
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.core.config import settings
+from app.core.config import as_async_uri, settings
+from app.core.instrumentation import instrument_engine
+from app.db.pool import TimedAsyncAdaptedQueuePool, TimedQueuePool
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
+
+def pool_options(asynchronous: bool = False) -> Dict[str, Any]:
+    return dict(
+        pool_size=(
+            settings.DB_ASYNC_POOL_SIZE if asynchronous
+            else settings.DB_POOL_SIZE
+        ),
+        max_overflow=(
+            settings.DB_ASYNC_MAX_OVERFLOW if asynchronous
+            else settings.DB_MAX_OVERFLOW
+        ),
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_use_lifo=settings.DB_POOL_USE_LIFO,
+    )
+
+
+engine = create_engine(
+    settings.SQLALCHEMY_DATABASE_URI,
+    poolclass=TimedQueuePool,
+    **pool_options()
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_engine = create_async_engine(
+    settings.SQLALCHEMY_ASYNC_DATABASE_URI,
+    poolclass=TimedAsyncAdaptedQueuePool,
+    **pool_options(asynchronous=True)
+)
+AsyncSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    class_=AsyncSession,
+    bind=async_engine,
+)
+
+# One async session factory per read replica, in the order configured.
+ReplicaSessionLocals = [
+    sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+        class_=AsyncSession,
+        bind=create_async_engine(
+            as_async_uri(uri),
+            poolclass=TimedAsyncAdaptedQueuePool,
+            **pool_options(asynchronous=True)
+        ),
+    )
+    for uri in settings.DB_REPLICA_URIS
+]
+
+for bind in [engine, async_engine.sync_engine] + [
+    factory.kw['bind'].sync_engine for factory in ReplicaSessionLocals
+]:
+    instrument_engine(bind)
+
+
+async def warm_up_pools() -> None:
+    """
+    Open DB_POOL_WARMUP connections on every engine and return them to
+    their pools idle.
+    """
+    count = min(settings.DB_POOL_WARMUP, settings.DB_POOL_SIZE)
+    connections = [engine.connect() for _ in range(count)]
+    for connection in connections:
+        connection.close()
+    count = min(settings.DB_POOL_WARMUP, settings.DB_ASYNC_POOL_SIZE)
+    for async_bind in [async_engine] + [
+        factory.kw['bind'] for factory in ReplicaSessionLocals
+    ]:
+        connections = await asyncio.gather(
+            *(async_bind.connect() for _ in range(count))
+        )
+        for connection in connections:
+            await connection.close()
@@ -1,11 +1,20 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.api_v1.api import api_router
+from app.api.conditional import NotModified, not_modified_handler
+from app.api.deps import filter_error_handler
+from app.crud.filters import FilterError
+from app.core.instrumentation import instrument_request
+from app.db import invalidation
+from app.db.replicas import PRIMARY_PIN_COOKIE, primary_pin_expiry
+from app.db.session import warm_up_pools
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -14,8 +23,51 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Next-Cursor", "Server-Timing", "ETag", "Last-Modified",
+        "X-Total-Count", "X-Total-Count-Estimated", "Link",
+    ],
 )
 
+app.add_exception_handler(NotModified, not_modified_handler)
+app.add_exception_handler(FilterError, filter_error_handler)
+
+
+@app.on_event("startup")
+async def startup():
+    await warm_up_pools()
+    invalidation.start_listener()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    invalidation.stop_listener()
+
+
+@app.middleware("http")
+async def pin_reads_after_write(request: Request, call_next):
+    """
+    After a successful write, send the client's reads to the primary for a
+    few seconds so it never reads a replica that hasn't caught up yet.
+    """
+    response = await call_next(request)
+    if (
+        settings.DB_READ_YOUR_WRITES_SECONDS
+        and settings.DB_REPLICA_URIS
+        and request.method not in ("GET", "HEAD", "OPTIONS")
+        and response.status_code < 400
+    ):
+        response.set_cookie(
+            PRIMARY_PIN_COOKIE,
+            str(primary_pin_expiry()),
+            max_age=settings.DB_READ_YOUR_WRITES_SECONDS,
+            httponly=True,
+        )
+    return response
+
+
+app.middleware("http")(instrument_request)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
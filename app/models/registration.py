@@ -1,7 +1,10 @@
 from sqlalchemy import (
     Column,
     ForeignKey,
+    Index,
     String,
+    UniqueConstraint,
+    text,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.types import BigInteger
@@ -9,8 +12,25 @@ from app.db.base_class import Base
 
 
 class Registration(Base):
+    __table_args__ = (
+        UniqueConstraint(
+            'student_id', 'school_year_id',
+            name='uq_registrations_student_id_school_year_id'
+        ),
+        Index(
+            'ix_registrations_school_year_id_grade_id_id',
+            'school_year_id', 'grade_id', 'id',
+            postgresql_include=['student_id', 'regi_no']
+        ),
+        Index('ix_registrations_grade_id', 'grade_id'),
+        Index(
+            'ix_registrations_old_registration_id', 'old_registration_id',
+            postgresql_where=text('old_registration_id IS NOT NULL')
+        ),
+    )
+
     id = Column(BigInteger, primary_key=True)
-    regi_no = Column(String, nullable=False)
+    regi_no = Column(String, unique=True, nullable=False)
     student_id = Column(ForeignKey('students.id'), nullable=False)
     grade_id = Column(ForeignKey('grades.id'), nullable=False)
     school_year_id = Column(ForeignKey('schoolyears.id'), nullable=False)
@@ -0,0 +1,12 @@
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Integer,
+)
+from app.db.base_class import Base
+
+
+class RegistrationCounter(Base):
+    school_year_id = Column(ForeignKey('schoolyears.id'), primary_key=True)
+    grade_id = Column(ForeignKey('grades.id'), primary_key=True)
+    last_value = Column(Integer, default=0, nullable=False)
\ No newline at end of file
@@ -1,16 +1,43 @@
 from sqlalchemy import (
     Column,
+    Computed,
     ForeignKey,
+    Index,
     String,
     Date,
     Boolean,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.types import BigInteger
 from app.db.base_class import Base
 
 
 class Student(Base):
+    __table_args__ = (
+        # Blocking keys of the duplicate check, see CRUDStudent.
+        Index(
+            'ix_students_date_of_birth_name_block_key',
+            'date_of_birth', 'name_block_key'
+        ),
+        Index(
+            'ix_students_date_of_birth_guardian_phone_no',
+            'date_of_birth', 'guardian_phone_no'
+        ),
+        # Sort orders of /students, the id breaking ties for keyset pages.
+        Index('ix_students_first_name_id', 'first_name', 'id'),
+        Index('ix_students_last_name_id', 'last_name', 'id'),
+        Index('ix_students_date_of_birth_id', 'date_of_birth', 'id'),
+        # Prefix filters, LIKE 'value%' can't seek a collation-ordered index.
+        Index(
+            'ix_students_first_name_pattern', 'first_name',
+            postgresql_ops={'first_name': 'text_pattern_ops'}
+        ),
+        Index(
+            'ix_students_last_name_pattern', 'last_name',
+            postgresql_ops={'last_name': 'text_pattern_ops'}
+        ),
+    )
+
     id = Column(BigInteger, primary_key=True)
     first_name = Column(String, nullable=False)
     father_name = Column(String, nullable=False)
@@ -20,6 +47,12 @@ class Student(Base):
     date_of_birth = Column(Date, nullable=False)
     guardian_phone_no = Column(String, nullable=False)
     nationality_id = Column(ForeignKey('nationalities.id'), nullable=False)
+    # Normalized first and last name, app.core.arabic.name_block_key in SQL.
+    name_block_key = deferred(Column(
+        String,
+        Computed("normalize_arabic(first_name || ' ' || last_name)"),
+        nullable=False
+    ))
 
     registrations = relationship('Registration', back_populates='student')
     nationality = relationship('Nationality', back_populates='students')
\ No newline at end of file
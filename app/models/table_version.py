@@ -0,0 +1,18 @@
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    String,
+)
+from app.db.base_class import Base
+
+
+class TableVersion(Base):
+    """
+    Bumped once by the commit of every transaction writing `table_name`,
+    so GET routes can validate their cached responses without reading the
+    tables themselves.
+    """
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False)
+    modified_at = Column(DateTime(timezone=True), nullable=False)
\ No newline at end of file
@@ -11,6 +11,7 @@ from .subject import (
 from .grade_subject import (
     GradeSubjectOut,
     GradeSubjectsOut,
+    GradeSubjectMatrix,
     GradeSubjectCreate,
     GradeSubjectUpdate,
 )
@@ -23,15 +24,34 @@ from .student import (
     StudentCreate,
     StudentUpdate,
     StudentInDB,
+    StudentImportError,
+    StudentImportResult,
+    StudentDuplicateCluster,
 )
 from .registration import (
     RegistrationCreate,
     RegistrationUpdate,
     RegistrationOut,
     RegistrationIn,
+    RegistrationBulkResult,
+)
+from .promotion import (
+    PromotionAction,
+    PromotionOverride,
+    PromotionIn,
+    PromotionOut,
 )
 from .nationality import (
     NationalityCreate,
     NationalityUpdate,
     NationalityInDB,
 )
+from .pool import (
+    CheckoutWait,
+    CheckoutWaitBucket,
+    PoolStatus,
+)
+from .query_stat import QueryStat
+from .response_cache import ResponseCacheStats
+from .export import ExportFormat
+from .count import CountMode
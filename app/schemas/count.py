@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class CountMode(str, Enum):
+    # Always count every matching row.
+    exact = 'exact'
+    # Planner estimate: pg_class.reltuples, or EXPLAIN when filtered.
+    estimate = 'estimate'
+    # Exact up to EXACT_COUNT_LIMIT rows, estimated beyond.
+    auto = 'auto'
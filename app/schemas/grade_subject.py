@@ -24,6 +24,16 @@ class GradeSubjectOut(GradeSubjectOutBase):
     subject: SubjectInDB
 
 
+class GradeSubjectIds(GradeInDB):
+    subject_ids: List[int]
+
+
+class GradeSubjectMatrix(BaseModel):
+    subjects: List[SubjectInDB]
+    # Each grade with the ids of its subjects, in ascending order.
+    grades: List[GradeSubjectIds]
+
+
 class GradeSubjectCreate(Base):
     pass
 
@@ -0,0 +1,25 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class CheckoutWaitBucket(BaseModel):
+    # Upper bound of the bucket; None for the overflow bucket.
+    le_ms: Optional[float]
+    count: int
+
+
+class CheckoutWait(BaseModel):
+    count: int
+    sum_ms: float
+    timeouts: int
+    buckets: List[CheckoutWaitBucket]
+
+
+class PoolStatus(BaseModel):
+    name: str
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    max_overflow: int
+    checkout_wait: Optional[CheckoutWait]
@@ -0,0 +1,38 @@
+from enum import Enum
+from typing import List
+from pydantic import (
+    BaseModel,
+    validator
+)
+
+
+class PromotionAction(str, Enum):
+    promote = 'promote'
+    hold_back = 'hold_back'
+    graduate = 'graduate'
+
+
+class PromotionOverride(BaseModel):
+    student_id: int
+    action: PromotionAction
+
+
+class PromotionIn(BaseModel):
+    from_school_year_id: int
+    to_school_year_id: int
+    overrides: List[PromotionOverride] = []
+    dry_run: bool = False
+
+    @validator("to_school_year_id")
+    def validate_to_school_year_id(cls, v, values):
+        if values.get('from_school_year_id') == v:
+            raise ValueError('Cannot promote students into the same school year.')
+        return v
+
+
+class PromotionOut(BaseModel):
+    promoted: int
+    held_back: int
+    graduated: int
+    already_registered: int
+    dry_run: bool
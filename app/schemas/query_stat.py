@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+
+class QueryStat(BaseModel):
+    statement: str
+    calls: int
+    total_ms: float
+    mean_ms: float
+    max_ms: float
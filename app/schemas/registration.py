@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import (
     BaseModel,
     validator
@@ -34,6 +35,14 @@ class RegistrationIn(BaseModel):
     grade_id: int
 
 
+class RegistrationBulkResult(BaseModel):
+    student_id: int
+    grade_id: int
+    registration_id: Optional[int] = None
+    regi_no: Optional[str] = None
+    error: Optional[str] = None
+
+
 class RegistrationOut(BaseModel):
     id: int
     regi_no: str
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class ResponseCacheStats(BaseModel):
+    entries: int
+    size: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
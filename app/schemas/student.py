@@ -1,6 +1,7 @@
 import re
 from datetime import date
 from datetime import datetime
+from typing import List
 from pydantic import (
     BaseModel,
     validator
@@ -17,6 +18,16 @@ class Base(BaseModel):
     date_of_birth: date
     guardian_phone_no: str
 
+    @validator(
+        "first_name", "father_name", "gfather_name", "last_name",
+        "guardian_phone_no"
+    )
+    def validate_no_nul(cls, value: str):
+        # Postgres text can't hold them.
+        if '\x00' in value:
+            raise ValueError('Must not contain NUL characters.')
+        return value
+
     @validator("first_name")
     def validate_first_name(cls, value: str):
         value = value.strip()
@@ -79,3 +90,19 @@ class StudentInDB(Base):
 
     class Config:
         orm_mode = True
+
+
+class StudentImportError(BaseModel):
+    # 1-based position of the record in the uploaded file.
+    row: int
+    errors: List[str]
+
+
+class StudentImportResult(BaseModel):
+    imported: int
+    errors: List[StudentImportError]
+
+
+class StudentDuplicateCluster(BaseModel):
+    # Students linked by shared blocking keys, lowest id first.
+    student_ids: List[int]
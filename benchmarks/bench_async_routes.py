@@ -0,0 +1,85 @@
+"""
+Concurrent list reads, as the GET routes serve them on the async engine
+(asyncpg), against the sync engine (psycopg2) in worker threads, as
+FastAPI ran the sync routes they replaced. Each read loads a page of
+registrations with their nested relationships and validates it through
+RegistrationOut.
+
+    python -m benchmarks.bench_async_routes --requests 1000 --concurrency 50
+"""
+from benchmarks import common
+
+import argparse
+import asyncio
+import time
+from typing import Callable, List
+from anyio import to_thread
+from app import crud, schemas
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, SessionLocal
+
+
+def render(registrations) -> List[schemas.RegistrationOut]:
+    return [
+        schemas.RegistrationOut.from_orm(registration)
+        for registration in registrations
+    ]
+
+
+async def read_async(limit: int) -> None:
+    async with AsyncSessionLocal() as db:
+        render(await crud.registeration.get_multi_async(db, limit=limit))
+
+
+def read_sync(limit: int) -> None:
+    with SessionLocal() as db:
+        render(crud.registeration.get_multi(db, limit=limit))
+
+
+async def read_in_thread(limit: int) -> None:
+    await to_thread.run_sync(read_sync, limit)
+
+
+async def run(
+    name: str, read: Callable, requests: int, concurrency: int, limit: int
+) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    seconds: List[float] = []
+
+    async def timed() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await read(limit)
+            seconds.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(timed() for _ in range(concurrency)))  # warm up
+    seconds.clear()
+    started = time.perf_counter()
+    await asyncio.gather(*(timed() for _ in range(requests)))
+    common.report(name, seconds, time.perf_counter() - started)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    common.seed(args.students)
+    print(
+        f'pools: sync {settings.DB_POOL_SIZE}+{settings.DB_MAX_OVERFLOW},'
+        f' async {settings.DB_ASYNC_POOL_SIZE}+'
+        f'{settings.DB_ASYNC_MAX_OVERFLOW};'
+        f' concurrency {args.concurrency}, limit {args.limit}'
+    )
+    for name, read in (
+        ('async engine', read_async),
+        ('sync engine in threads', read_in_thread),
+    ):
+        await run(name, read, args.requests, args.concurrency, args.limit)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+"""
+Time to load and encode one page of registrations in each
+LIST_RENDER_MODE: "orm" validates ORM objects through RegistrationOut and
+encodes them like FastAPI's response_model, "rows" maps the projected Core
+rows to dicts for orjson, "database" has Postgres build the JSON.
+
+    python -m benchmarks.bench_list_render --limit 1000 --repeat 20
+"""
+from benchmarks import common
+
+import argparse
+import asyncio
+import time
+from typing import List
+import orjson
+from fastapi.encoders import jsonable_encoder
+from app import crud, schemas
+from app.db.session import AsyncSessionLocal
+
+
+async def render_orm(db, limit: int) -> bytes:
+    registrations = await crud.registeration.get_multi_async(db, limit=limit)
+    return orjson.dumps(jsonable_encoder([
+        schemas.RegistrationOut.from_orm(registration)
+        for registration in registrations
+    ]))
+
+
+async def render_rows(db, limit: int) -> bytes:
+    return orjson.dumps(await crud.registeration.get_multi_rows_async(
+        db, schemas.RegistrationOut, limit=limit
+    ))
+
+
+async def render_database(db, limit: int) -> bytes:
+    body, _, _, _ = await crud.registeration.get_multi_json_async(
+        db, schemas.RegistrationOut, limit=limit
+    )
+    return body.encode()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--limit', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    common.seed(args.limit)
+    bodies = {}
+    async with AsyncSessionLocal() as db:
+        for mode, render in (
+            ('orm', render_orm),
+            ('rows', render_rows),
+            ('database', render_database),
+        ):
+            bodies[mode] = await render(db, args.limit)  # warm up
+            seconds: List[float] = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                await render(db, args.limit)
+                seconds.append(time.perf_counter() - started)
+                # Every page is loaded afresh, as in a new request.
+                db.expunge_all()
+            common.report(f'{mode} ({args.limit} rows)', seconds)
+            print(f'{"":<32} {min(seconds) / args.limit * 1e6:.1f} us/row')
+    # Same document whichever way it is rendered.
+    assert len({orjson.dumps(orjson.loads(body)) for body in bodies.values()}) == 1
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,48 @@
+"""
+POST /students/import of a generated CSV or NDJSON file, end to end
+through the application, by default with 100k rows.
+
+    python -m benchmarks.bench_student_import --rows 100000 --format csv
+"""
+from benchmarks import common
+
+import argparse
+import time
+import orjson
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.main import app
+from tests.utils import as_csv, student_rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv')
+    args = parser.parse_args()
+
+    ids = common.seed(0)
+    rows = student_rows(args.rows, ids['nationality_id'])
+    if args.format == 'csv':
+        content = as_csv(rows)
+    else:
+        content = b'\n'.join(orjson.dumps(row, default=str) for row in rows)
+
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        response = client.post(
+            f'{settings.API_V1_STR}/students/import',
+            files={'file': (f'students.{args.format}', content)},
+        )
+        elapsed = time.perf_counter() - started
+    response.raise_for_status()
+    result = response.json()
+    print(
+        f'{args.rows} {args.format} rows: {result["imported"]} imported,'
+        f' {len(result["errors"])} rejected in {elapsed:.2f}s'
+        f' ({args.rows / elapsed:.0f} rows/s)'
+    )
+
+
+if __name__ == '__main__':
+    main()
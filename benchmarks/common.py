@@ -0,0 +1,61 @@
+"""
+Shared setup of the benchmarks. Like the tests, they run against the
+Postgres database named by TEST_DB_NAME ("school_test" by default), whose
+schema they drop and rebuild: never point it at a database holding data
+you care about. Run them from the repository root, e.g.
+
+    python -m benchmarks.bench_async_routes
+"""
+import os
+
+os.environ['DB_NAME'] = os.environ.get('TEST_DB_NAME', 'school_test')
+os.environ['DB_REPLICA_URIS'] = '[]'
+
+import statistics
+from typing import Dict, List, Optional
+from app.db.session import SessionLocal, engine
+from tests.utils import (
+    create_reference_data,
+    create_students,
+    register_students,
+    reset_schema,
+)
+
+
+def seed(students: int) -> Dict[str, int]:
+    """
+    Rebuild the schema and register `students` students into grade 1 of
+    the active school year.
+    """
+    with engine.begin() as connection:
+        reset_schema(connection)
+    with SessionLocal() as db:
+        data = create_reference_data(db)
+        ids = create_students(db, students, data['nationality'].id)
+        register_students(
+            db, ids, grade_id=data['grades'][0].id,
+            school_year_id=data['school_year'].id
+        )
+        return {
+            'nationality_id': data['nationality'].id,
+            'grade_id': data['grades'][0].id,
+            'school_year_id': data['school_year'].id,
+        }
+
+
+def report(
+    name: str, seconds: List[float], elapsed: Optional[float] = None
+) -> None:
+    """
+    Print the median, 95th percentile and, given the wall clock `elapsed`
+    time, the throughput of timed operations.
+    """
+    ordered = sorted(seconds)
+    line = (
+        f'{name:<32} n={len(ordered):<6}'
+        f' p50={statistics.median(ordered) * 1000:8.2f}ms'
+        f' p95={ordered[int(len(ordered) * 0.95) - 1] * 1000:8.2f}ms'
+    )
+    if elapsed:
+        line += f' {len(ordered) / elapsed:8.1f}/s'
+    print(line)
@@ -0,0 +1,97 @@
+"""
+The tests run against a real Postgres database, TEST_DB_NAME ("school_test"
+by default), on the server configured by the usual DB_* variables or .env.
+Its schema is dropped and rebuilt from the models: never point it at a
+database holding data you care about. They are skipped when the server
+can't be reached.
+"""
+import os
+
+os.environ['DB_NAME'] = os.environ.get('TEST_DB_NAME', 'school_test')
+os.environ['DB_REPLICA_URIS'] = '[]'
+
+from typing import Iterator, List
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from app.db import invalidation
+from app.db.session import SessionLocal, async_engine, engine
+from app.main import app
+from tests.utils import reset_schema, truncate_all
+
+
+@pytest.fixture(scope='session', autouse=True)
+def database() -> Iterator[None]:
+    try:
+        connection = engine.connect()
+    except OperationalError as exc:
+        pytest.skip(f'Test database unavailable: {exc.orig}')
+    with connection, connection.begin():
+        reset_schema(connection)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def clean_tables() -> Iterator[None]:
+    yield
+    with engine.begin() as connection:
+        truncate_all(connection)
+    # The caches of this process still hold the truncated rows.
+    invalidation._dispatch(None, None)
+
+
+@pytest.fixture
+def db() -> Iterator[Session]:
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope='session')
+def client() -> Iterator[TestClient]:
+    # Entered once, so every request runs on the same event loop as the
+    # async engine's pooled connections.
+    with TestClient(app) as client:
+        yield client
+
+
+class QueryLog:
+    """
+    Statements sent by the sync and async engines while recording.
+    """
+
+    def __init__(self) -> None:
+        self.statements: List[str] = []
+        self.recording = False
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context,
+                executemany) -> None:
+        if self.recording:
+            self.statements.append(statement)
+
+    def __enter__(self) -> 'QueryLog':
+        self.statements.clear()
+        self.recording = True
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.recording = False
+
+
+@pytest.fixture
+def queries() -> Iterator[QueryLog]:
+    log = QueryLog()
+    binds = [engine, async_engine.sync_engine]
+    for bind in binds:
+        event.listen(bind, 'before_cursor_execute', log._record)
+    yield log
+    for bind in binds:
+        event.remove(bind, 'before_cursor_execute', log._record)
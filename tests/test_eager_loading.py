@@ -0,0 +1,42 @@
+import pytest
+from app.core.config import settings
+from app.db import invalidation
+from tests.utils import (
+    create_reference_data,
+    create_students,
+    register_students,
+)
+
+# Page query plus the tableversions lookup of the conditional GET.
+STATEMENTS_PER_LIST = 2
+
+
+@pytest.fixture
+def registered(db):
+    data = create_reference_data(db)
+    student_ids = create_students(db, 150, data['nationality'].id)
+    register_students(
+        db, student_ids, grade_id=data['grades'][0].id,
+        school_year_id=data['school_year'].id
+    )
+
+
+@pytest.mark.parametrize('mode', ['orm', 'rows', 'database'])
+@pytest.mark.parametrize('path', ['/registrations', '/students'])
+def test_list_query_count_does_not_grow_with_page_size(
+    client, queries, registered, monkeypatch, mode, path
+):
+    monkeypatch.setattr(settings, 'LIST_RENDER_MODE', mode)
+    counts = {}
+    for limit in (1, 100):
+        # Served from the database, not the response cache.
+        invalidation._dispatch(None, None)
+        with queries:
+            response = client.get(
+                f'{settings.API_V1_STR}{path}', params={'limit': limit}
+            )
+        assert response.status_code == 200
+        assert len(response.json()) == limit
+        counts[limit] = len(queries)
+
+    assert counts == {1: STATEMENTS_PER_LIST, 100: STATEMENTS_PER_LIST}
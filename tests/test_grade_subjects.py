@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import update
+from app.core.config import settings
+from app.db.base import GradeSubject, Subject
+from tests.utils import create_reference_data
+
+URL = f'{settings.API_V1_STR}/grades'
+
+
+@pytest.fixture
+def grade_id(db):
+    grade_id = create_reference_data(db, grades=1)['grades'][0].id
+    subjects = [
+        Subject(name=name)
+        for name in ('علوم', 'رياضيات', 'لغة عربية', 'تاريخ')
+    ]
+    db.add_all(subjects)
+    db.flush()
+    db.add_all([
+        GradeSubject(grade_id=grade_id, subject_id=subject.id)
+        for subject in subjects[::2]
+    ])
+    db.commit()
+    # Rewritten at the end of the heap: no longer first in a sequential
+    # scan.
+    db.execute(update(Subject).where(Subject.id == subjects[0].id).values(
+        name='العلوم'
+    ))
+    db.commit()
+    return grade_id
+
+
+@pytest.mark.parametrize(
+    'assigned, positions', [(True, [0, 2]), (False, [1, 3])]
+)
+def test_grade_subjects_are_listed_by_id(
+    client, grade_id, assigned, positions
+):
+    response = client.get(
+        f'{URL}/{grade_id}/subjects', params={'assigned': assigned}
+    )
+
+    assert response.status_code == 200
+    ids = [subject['id'] for subject in response.json()['subjects']]
+    assert ids == [position + 1 for position in positions]
+
+
+def test_subject_matrix_lists_subjects_and_grades_by_id(client, grade_id):
+    response = client.get(f'{URL}/subjects/matrix')
+
+    assert response.status_code == 200
+    matrix = response.json()
+    assert [subject['id'] for subject in matrix['subjects']] == [1, 2, 3, 4]
+    assert matrix['subjects'][0]['name'] == 'العلوم'
+    assert [grade['subject_ids'] for grade in matrix['grades']] == [[1, 3]]
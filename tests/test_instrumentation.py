@@ -0,0 +1,14 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from app.db.session import engine
+
+
+def test_failed_statements_do_not_leak_start_times():
+    with engine.connect() as connection:
+        for _ in range(3):
+            with pytest.raises(ProgrammingError):
+                connection.execute(text('SELECT * FROM missing_table'))
+        connection.execute(text('SELECT 1'))
+
+        assert connection.info['query_started'] == []
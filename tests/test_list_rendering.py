@@ -0,0 +1,102 @@
+import json
+from datetime import date
+import pytest
+from sqlalchemy import update
+from app.core.config import settings
+from app.db import invalidation
+from app.db.base import Nationality, Student
+from tests.utils import (
+    create_reference_data,
+    create_students,
+    register_students,
+)
+
+
+@pytest.fixture
+def registered(db):
+    data = create_reference_data(db)
+    quoted = Nationality(
+        masculine_form='مصري', feminine_form='مصرية',
+        notes='ملاحظة "مقتبسة"\nوسطر ثانٍ \\ شرطة',
+    )
+    db.add(quoted)
+    db.commit()
+    student_ids = create_students(db, 30, data['nationality'].id)
+    db.execute(
+        update(Student).where(Student.id.in_(student_ids[::2]))
+        .values(nationality_id=quoted.id)
+    )
+    db.commit()
+    register_students(
+        db, student_ids, grade_id=data['grades'][0].id,
+        school_year_id=data['school_year'].id
+    )
+    return data
+
+
+def get_list(client, monkeypatch, mode, path, **params):
+    monkeypatch.setattr(settings, 'LIST_RENDER_MODE', mode)
+    invalidation._dispatch(None, None)
+    response = client.get(f'{settings.API_V1_STR}{path}', params=params)
+    assert response.status_code == 200
+    return response
+
+
+def ordered(response):
+    # Key order included: the documents must match field for field.
+    return json.loads(response.text, object_pairs_hook=list)
+
+
+@pytest.mark.parametrize('path, params', [
+    ('/registrations', {'limit': 100}),
+    ('/students', {'limit': 100}),
+    ('/students', {'limit': 7, 'order_by': '-date_of_birth'}),
+])
+def test_database_rendering_matches_the_response_model(
+    client, monkeypatch, registered, path, params
+):
+    expected = get_list(client, monkeypatch, 'orm', path, **params)
+    for mode in ('rows', 'database'):
+        response = get_list(client, monkeypatch, mode, path, **params)
+
+        assert ordered(response) == ordered(expected)
+        assert response.headers.get('x-next-cursor') == (
+            expected.headers.get('x-next-cursor')
+        )
+
+
+def test_database_rendering_golden_student(client, monkeypatch, registered):
+    body = get_list(
+        client, monkeypatch, 'database', '/registrations', limit=2
+    ).json()
+
+    assert body[0] == {
+        'id': 1,
+        'regi_no': 'T1-1',
+        'student': {
+            'first_name': 'أحمد',
+            'father_name': 'عبد الله',
+            'gfather_name': 'صالح',
+            'last_name': 'الحكيم',
+            'gender': True,
+            'date_of_birth': date(2010, 1, 1).isoformat(),
+            'guardian_phone_no': '700000000',
+            'id': 1,
+            'nationality': {
+                'masculine_form': 'مصري',
+                'feminine_form': 'مصرية',
+                'notes': 'ملاحظة "مقتبسة"\nوسطر ثانٍ \\ شرطة',
+                'id': 2,
+            },
+        },
+        'grade': {'name': 'Grade 1', 'numeric_value': 1, 'id': 1},
+        'school_year': {
+            'title': '2022-2023',
+            'start_date': '2022-09-01',
+            'end_date': '2023-06-30',
+            'id': 1,
+            'is_active': True,
+        },
+    }
+    assert body[1]['student']['nationality']['notes'] is None
+    assert body[1]['student']['gender'] is False
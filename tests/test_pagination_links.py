@@ -0,0 +1,29 @@
+from app.core.config import settings
+from app.db import invalidation
+from tests.utils import create_reference_data, create_students
+
+URL = f'{settings.API_V1_STR}/students'
+
+
+def links(response):
+    return {
+        link.split('; rel=')[1].strip('"'): link.split(';')[0].strip('<> ')
+        for link in response.headers['Link'].split(', ')
+    }
+
+
+def test_last_page_is_linked_for_small_exact_totals(client, db, monkeypatch):
+    create_students(db, 5, create_reference_data(db)['nationality'].id)
+    params = {'limit': 2, 'count': 'exact'}
+
+    small = client.get(URL, params=params)
+    monkeypatch.setattr(settings, 'EXACT_COUNT_LIMIT', 4)
+    invalidation._dispatch(None, None)
+    large = client.get(URL, params=params)
+    estimated = client.get(URL, params={**params, 'count': 'estimate'})
+
+    assert small.headers['X-Total-Count'] == '5'
+    assert links(small)['last'].endswith('skip=4')
+    assert large.headers['X-Total-Count'] == '5'
+    assert set(links(large)) == {'first', 'next'}
+    assert set(links(estimated)) == {'first', 'next'}
@@ -0,0 +1,82 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from sqlalchemy import insert, text
+from sqlalchemy.dialects.postgresql import insert as upsert
+from app import crud
+from app.core.config import settings
+from app.db.base import Grade, TableVersion
+from app.db.session import SessionLocal
+
+
+def set_version(db, table, version):
+    # What the tableversions triggers do, which the test schema lacks.
+    stmt = upsert(TableVersion).values(
+        table_name=table, version=version,
+        modified_at=datetime.now(timezone.utc)
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[TableVersion.table_name],
+        set_={'version': stmt.excluded.version}
+    ))
+    db.commit()
+
+
+def test_cache_is_loaded_from_the_primary_not_the_callers_snapshot(db):
+    # A caller whose snapshot predates the write, like a lagging replica.
+    stale = SessionLocal()
+    stale.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+    stale.execute(text('SELECT 1'))
+    db.add(Grade(name='Grade 1', numeric_value=1))
+    db.commit()
+
+    try:
+        assert crud.grade.get_by_name(stale, name='Grade 1') is not None
+    finally:
+        stale.close()
+
+
+def test_cache_older_than_the_etag_is_reloaded(client, db):
+    set_version(db, 'grades', 1)
+    first = Grade(name='Grade 1', numeric_value=1)
+    db.add(first)
+    db.commit()
+    assert crud.grade.get(db, first.id) is not None
+    # Written outside the API: no invalidation, only the trigger's bump.
+    second_id = db.execute(
+        insert(Grade).values(name='Grade 2', numeric_value=2)
+        .returning(Grade.id)
+    ).scalar()
+    set_version(db, 'grades', 2)
+
+    response = client.get(f'{settings.API_V1_STR}/grades/{second_id}')
+
+    assert response.status_code == 200
+    assert response.json()['name'] == 'Grade 2'
+
+
+def test_concurrent_misses_share_one_load(db, monkeypatch):
+    db.add(Grade(name='Grade 1', numeric_value=1))
+    db.commit()
+    crud.grade.invalidate()
+    loads = []
+    load = crud.grade._load
+
+    def slow_load(loader):
+        loads.append(threading.get_ident())
+        # Long enough for every thread to miss the cache meanwhile.
+        time.sleep(0.2)
+        return load(loader)
+
+    monkeypatch.setattr(crud.grade, '_load', slow_load)
+
+    def get_grade(_):
+        with SessionLocal() as session:
+            return crud.grade.get_by_name(session, name='Grade 1').name
+
+    with ThreadPoolExecutor(8) as executor:
+        names = list(executor.map(get_grade, range(8)))
+
+    assert names == ['Grade 1'] * 8
+    assert len(loads) == 1
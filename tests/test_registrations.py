@@ -0,0 +1,184 @@
+from datetime import date
+import pytest
+from sqlalchemy import func, insert, select, text
+from app import crud
+from app.core.config import settings
+from app.db.base import Grade, Registration, RegistrationCounter, SchoolYear
+from tests.utils import (
+    create_reference_data,
+    create_students,
+    register_students,
+)
+
+URL = f'{settings.API_V1_STR}/registrations'
+
+
+@pytest.fixture
+def data(db):
+    data = create_reference_data(db)
+    grade_11 = Grade(name='Grade 11', numeric_value=11)
+    db.add(grade_11)
+    db.commit()
+    data['grades'].append(grade_11)
+    return data
+
+
+def set_counter(db, data, grade, last_value):
+    db.execute(insert(RegistrationCounter).values(
+        school_year_id=data['school_year'].id, grade_id=grade.id,
+        last_value=last_value
+    ))
+    db.commit()
+
+
+def test_regi_nos_stay_unique_across_grade_and_sequence_widths(
+    client, db, data
+):
+    grade_1, grade_11 = data['grades'][0], data['grades'][-1]
+    # Grade 1 number 1005 and grade 11 number 5.
+    set_counter(db, data, grade_1, 1004)
+    set_counter(db, data, grade_11, 4)
+    first, second = create_students(db, 2, data['nationality'].id)
+
+    responses = [
+        client.post(URL, json={'student_id': first, 'grade_id': grade_1.id}),
+        client.post(URL, json={'student_id': second, 'grade_id': grade_11.id}),
+    ]
+
+    assert [response.status_code for response in responses] == [201, 201]
+    assert [response.json()['regi_no'] for response in responses] == [
+        '22231-1005', '222311-005'
+    ]
+
+
+def test_bulk_regi_nos_stay_unique_across_grade_and_sequence_widths(
+    client, db, data
+):
+    grade_1, grade_11 = data['grades'][0], data['grades'][-1]
+    set_counter(db, data, grade_1, 1004)
+    set_counter(db, data, grade_11, 4)
+    first, second = create_students(db, 2, data['nationality'].id)
+
+    response = client.post(f'{URL}/bulk', json=[
+        {'student_id': first, 'grade_id': grade_1.id},
+        {'student_id': second, 'grade_id': grade_11.id},
+    ])
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [result['error'] for result in results] == [None, None]
+    assert [result['regi_no'] for result in results] == [
+        '22231-1005', '222311-005'
+    ]
+    assert db.execute(
+        select(Registration.regi_no).order_by(Registration.id)
+    ).scalars().all() == ['22231-1005', '222311-005']
+
+
+def test_enrollment_losing_a_race_is_a_conflict(
+    client, db, data, monkeypatch
+):
+    grade_1, grade_2 = data['grades'][:2]
+    year = data['school_year'].id
+    student_id, = create_students(db, 1, data['nationality'].id)
+    register_students(db, [student_id], grade_id=grade_1.id,
+                      school_year_id=year)
+    # Committed by a concurrent request after this one's check.
+    monkeypatch.setattr(
+        crud.registeration, 'get_registration_by_grade_student_school_year',
+        lambda *args, **kwargs: None
+    )
+
+    response = client.post(
+        URL, json={'student_id': student_id, 'grade_id': grade_2.id}
+    )
+
+    assert response.status_code == 409
+    assert response.json()['detail'] == (
+        'Cannot register student in two classes on the same year.'
+    )
+    # The number reserved for the rejected registration is given back.
+    assert db.execute(
+        select(func.count()).select_from(RegistrationCounter)
+    ).scalar() == 0
+
+
+@pytest.fixture
+def next_year(db):
+    next_year = SchoolYear(
+        title='2023-2024', start_date=date(2023, 9, 1),
+        end_date=date(2024, 6, 30), is_active=False
+    )
+    db.add(next_year)
+    db.commit()
+    return next_year
+
+
+def test_promote_moves_every_student_once(client, db, data, next_year):
+    grade_1, grade_2, grade_3 = data['grades'][:3]
+    student_ids = create_students(db, 6, data['nationality'].id)
+    year = data['school_year'].id
+    register_students(
+        db, student_ids[:3], grade_id=grade_1.id, school_year_id=year
+    )
+    register_students(
+        db, student_ids[3:5], grade_id=grade_2.id, school_year_id=year
+    )
+    register_students(
+        db, student_ids[5:], grade_id=grade_3.id, school_year_id=year
+    )
+    # Already enrolled into the next year.
+    register_students(
+        db, student_ids[:1], grade_id=grade_2.id, school_year_id=next_year.id
+    )
+    set_counter(db, {'school_year': next_year}, grade_2, 1)
+    body = {
+        'from_school_year_id': year,
+        'to_school_year_id': next_year.id,
+        'overrides': [{'student_id': student_ids[3], 'action': 'hold_back'}],
+    }
+
+    dry_run = client.post(f'{URL}/promote', json={**body, 'dry_run': True})
+    response = client.post(f'{URL}/promote', json=body)
+
+    expected = {
+        'promoted': 3, 'held_back': 1, 'graduated': 1,
+        'already_registered': 1,
+    }
+    assert dry_run.json() == {**expected, 'dry_run': True}
+    assert response.json() == {**expected, 'dry_run': False}
+    rows = db.execute(
+        select(Registration.student_id, Registration.grade_id,
+               Registration.regi_no)
+        .where(Registration.school_year_id == next_year.id)
+        .order_by(Registration.student_id)
+    ).all()
+    assert rows == [
+        (student_ids[0], grade_2.id, f'T{next_year.id}-{student_ids[0]}'),
+        (student_ids[1], grade_2.id, '23242-002'),
+        (student_ids[2], grade_2.id, '23242-003'),
+        (student_ids[3], grade_2.id, '23242-004'),
+        (student_ids[4], grade_3.id, '23243-001'),
+    ]
+
+
+def test_bulk_enrolls_a_thousand_students(client, db, data):
+    student_ids = create_students(db, 1000, data['nationality'].id)
+    grade_id = data['grades'][0].id
+    # Seven digit ids: their list alone outgrows a NOTIFY payload.
+    db.execute(text(
+        'ALTER SEQUENCE registrations_id_seq RESTART WITH 1000000'
+    ))
+    db.commit()
+
+    response = client.post(f'{URL}/bulk', json=[
+        {'student_id': student_id, 'grade_id': grade_id}
+        for student_id in student_ids
+    ])
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [result['error'] for result in results] == [None] * 1000
+    assert db.execute(
+        select(func.count()).select_from(Registration)
+    ).scalar() == 1000
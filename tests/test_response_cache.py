@@ -0,0 +1,36 @@
+from app.api.response_cache import ResponseCache, _Entry
+
+
+def entry():
+    return _Entry(b'[]', {'content-type': 'application/json'}, [
+        ('grades', None)
+    ])
+
+
+def test_response_rendered_across_an_invalidation_is_not_stored():
+    cache = ResponseCache(1024, 60)
+    generation = cache.generation(['grades'])
+    # A write commits while the handler renders from the old rows.
+    cache.invalidate('grades', [1])
+    cache.set('key', entry(), ['grades'], generation)
+
+    assert cache.get('key') is None
+
+
+def test_response_rendered_without_invalidation_is_stored():
+    cache = ResponseCache(1024, 60)
+    generation = cache.generation(['grades'])
+    cache.invalidate('subjects', None)
+    cache.set('key', entry(), ['grades'], generation)
+
+    assert cache.get('key') is not None
+
+
+def test_nothing_is_stored_while_replicas_may_lag_behind_a_write():
+    cache = ResponseCache(1024, 60, settle=5)
+    cache.invalidate('grades', None)
+
+    assert cache.generation(['grades']) is None
+    assert cache.generation(['subjects']) is not None
+    cache.invalidate(None, None)
+    assert cache.generation(['subjects']) is None
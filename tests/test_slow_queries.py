@@ -0,0 +1,62 @@
+import json
+import logging
+import pytest
+from sqlalchemy import text
+from app.core import slow_queries
+from app.core.config import settings
+from app.db.session import engine
+
+
+class Records(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.entries = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.entries.append(json.loads(record.getMessage()))
+
+
+@pytest.fixture
+def slow_log(monkeypatch):
+    with engine.begin() as connection:
+        connection.execute(text('CREATE SEQUENCE explained'))
+    monkeypatch.setattr(settings, 'SLOW_QUERY_MS', 0)
+    monkeypatch.setattr(settings, 'SLOW_QUERY_SAMPLE_RATE', 1.0)
+    records = Records()
+    monkeypatch.setattr(slow_queries.logger, 'handlers', [records])
+    slow_queries.logger.setLevel(logging.INFO)
+    yield records
+    with engine.begin() as connection:
+        connection.execute(text('DROP SEQUENCE explained'))
+
+
+@pytest.mark.parametrize('mode, calls', [
+    ('off', 1), ('plan', 1), ('analyze', 2),
+])
+def test_only_analyze_re_runs_slow_statements(
+    monkeypatch, slow_log, mode, calls
+):
+    monkeypatch.setattr(settings, 'SLOW_QUERY_EXPLAIN', mode)
+    with engine.connect() as connection:
+        connection.execute(text("SELECT nextval('explained')"))
+        value = connection.execute(
+            text("SELECT last_value FROM explained")
+        ).scalar()
+
+    assert value == calls
+    entry = slow_log.entries[0]
+    assert 'nextval' in entry['statement']
+    assert (entry['plan'] is None) == (mode == 'off')
+
+
+def test_long_parameters_are_cut_short(slow_log):
+    keys = [str(number) for number in range(5000)]
+    with engine.connect() as connection:
+        connection.execute(
+            text('SELECT cardinality(:keys), length(:name)'),
+            {'keys': keys, 'name': 'ا' * 1000}
+        )
+
+    parameters = slow_log.entries[0]['parameters']
+    assert parameters['keys'] == keys[:10] + ['... 4990 more']
+    assert parameters['name'] == 'ا' * 200 + '... 1000 long'
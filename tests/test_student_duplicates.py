@@ -0,0 +1,100 @@
+import pytest
+from app.core.config import settings
+from tests.utils import as_csv, create_reference_data
+
+URL = f'{settings.API_V1_STR}/students'
+
+
+@pytest.fixture
+def nationality_id(db):
+    return create_reference_data(db)['nationality'].id
+
+
+def student(nationality_id, first_name, *, last_name='اليمني',
+            guardian_phone_no='771234567', date_of_birth='2012-03-04'):
+    return {
+        'first_name': first_name,
+        'father_name': 'عبد الله',
+        'gfather_name': 'صالح',
+        'last_name': last_name,
+        'gender': True,
+        'date_of_birth': date_of_birth,
+        'guardian_phone_no': guardian_phone_no,
+        'nationality_id': nationality_id,
+    }
+
+
+def create(client, body, **params):
+    response = client.post(URL, json=body, params=params)
+    assert response.status_code == 201
+    return response.json()['id']
+
+
+def test_twins_are_not_duplicates(client, nationality_id):
+    create(client, student(nationality_id, 'حسن'))
+
+    response = client.post(URL, json=student(nationality_id, 'فاطمة'))
+    imported = client.post(f'{URL}/import', files={'file': (
+        'students.csv', as_csv([student(nationality_id, 'مريم')])
+    )})
+
+    assert response.status_code == 201
+    assert imported.json() == {'imported': 1, 'errors': []}
+    assert client.get(f'{URL}/duplicates').json() == []
+
+
+def test_similar_first_names_with_the_same_phone_are_duplicates(
+    client, nationality_id
+):
+    first = create(client, student(nationality_id, 'عبد الرحمن'))
+    # A typo, and another last name: only the phone key is shared.
+    body = student(nationality_id, 'عبد الرحمان', last_name='الصنعاني')
+
+    response = client.post(URL, json=body)
+    imported = client.post(f'{URL}/import', files={
+        'file': ('students.csv', as_csv([body]))
+    })
+
+    assert response.status_code == 409
+    assert str(first) in response.json()['detail']
+    assert imported.json() == {'imported': 0, 'errors': [
+        {'row': 1, 'errors': [f'Possible duplicate of student {first}.']}
+    ]}
+
+
+def test_import_rows_duplicating_an_earlier_row_are_rejected(
+    client, nationality_id
+):
+    rows = [
+        student(nationality_id, 'حسن'),
+        student(nationality_id, 'حسين'),
+        student(nationality_id, 'مريم'),
+        student(nationality_id, 'أحمد', guardian_phone_no='700000000'),
+        student(nationality_id, 'احمد', guardian_phone_no='711111111'),
+    ]
+
+    response = client.post(f'{URL}/import', files={
+        'file': ('students.csv', as_csv(rows))
+    })
+
+    assert response.json() == {'imported': 3, 'errors': [
+        {'row': 2, 'errors': ['Possible duplicate of row 1.']},
+        {'row': 5, 'errors': ['Possible duplicate of row 4.']},
+    ]}
+
+
+def test_clusters_are_rooted_at_their_lowest_id(client, nationality_id):
+    # 1 and 3 share the phone key, 2 and 3 the name key: 3 joins two
+    # clusters, which must merge under 1.
+    ids = [
+        create(client, student(nationality_id, 'حسين'), allow_duplicates=True),
+        create(client, student(
+            nationality_id, 'حسن', guardian_phone_no='700000000'
+        ), allow_duplicates=True),
+        create(client, student(nationality_id, 'حسن'), allow_duplicates=True),
+        create(client, student(nationality_id, 'مريم'), allow_duplicates=True),
+    ]
+
+    response = client.get(f'{URL}/duplicates')
+
+    assert response.json() == [{'student_ids': ids[:3]}]
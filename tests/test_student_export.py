@@ -0,0 +1,31 @@
+import orjson
+from app.core.config import settings
+from tests.utils import create_reference_data, create_students
+
+URL = f'{settings.API_V1_STR}/students/export'
+
+
+def test_export_applies_the_list_filters_order_and_fields(client, db):
+    nationality_id = create_reference_data(db)['nationality'].id
+    student_ids = create_students(db, 10, nationality_id)
+
+    response = client.get(URL, params={
+        'date_of_birth__gte': '2010-01-04',
+        'gender': 'true',
+        'order_by': '-date_of_birth',
+        'fields': 'first_name',
+    })
+
+    assert response.status_code == 200
+    rows = [orjson.loads(line) for line in response.text.splitlines()]
+    # Even indexes are boys, born 2010-01-01 plus their index in days.
+    assert [row['id'] for row in rows] == [
+        student_ids[8], student_ids[6], student_ids[4]
+    ]
+    assert list(rows[0]) == ['first_name', 'date_of_birth', 'id']
+
+
+def test_export_rejects_unknown_orders(client):
+    response = client.get(URL, params={'order_by': 'guardian_phone_no'})
+
+    assert response.status_code == 400
@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+from app import crud
+from app.db.base import Student
+
+
+def plan(db, stmt):
+    compiled = stmt.compile(
+        dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}
+    )
+    # Small test tables would otherwise be scanned anyway.
+    db.execute(text('SET LOCAL enable_seqscan = off'))
+    rows = db.execute(text(f'EXPLAIN {compiled}')).scalars().all()
+    db.rollback()
+    return '\n'.join(rows)
+
+
+@pytest.mark.parametrize('key', ['first_name__prefix', 'last_name__prefix'])
+def test_prefix_filters_seek_an_index(db, key):
+    filters = crud.student.filter_spec.parse({key: 'عبد'})
+    stmt = select(Student.id).where(*filters.clauses)
+
+    # The prefix bounds the index scan, rather than filtering every entry.
+    assert 'Index Cond' in plan(db, stmt)
@@ -0,0 +1,83 @@
+import io
+import orjson
+import pytest
+from fastapi import UploadFile
+from sqlalchemy import func, select
+from app.api.upload import read_upload
+from app.core.config import settings
+from app.db.base import Student
+from tests.utils import as_csv, create_reference_data, student_rows
+
+URL = f'{settings.API_V1_STR}/students/import'
+
+
+class LegacySpooledFile:
+    """
+    The file API of SpooledTemporaryFile before Python 3.11, without
+    readable().
+    """
+
+    def __init__(self, data: bytes) -> None:
+        self._file = io.BytesIO(data)
+
+    def seek(self, *args):
+        return self._file.seek(*args)
+
+    def read(self, *args):
+        return self._file.read(*args)
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+def test_csv_is_read_from_files_without_readable():
+    data = as_csv([{'first_name': 'أحمد', 'notes': 'سطر\r\nثانٍ'}])
+
+    records = list(read_upload(
+        UploadFile('students.csv', LegacySpooledFile(data))
+    ))
+
+    assert records == [{'first_name': 'أحمد', 'notes': 'سطر\r\nثانٍ'}]
+
+
+@pytest.mark.parametrize('format', ['csv', 'ndjson'])
+def test_import_skips_invalid_rows(client, db, format):
+    data = create_reference_data(db)
+    rows = student_rows(2000, data['nationality'].id)
+    rows[10]['guardian_phone_no'] = '12'
+    rows[20]['last_name'] = 'a\x00b'
+    if format == 'csv':
+        content = as_csv(rows)
+    else:
+        content = b'\n'.join(orjson.dumps(row) for row in rows)
+
+    response = client.post(URL, files={
+        'file': (f'students.{format}', content)
+    })
+
+    assert response.status_code == 200
+    assert response.json() == {'imported': 1998, 'errors': [
+        {
+            'row': 11,
+            'errors': [
+                'guardian_phone_no: Please Enter a valid phone number.'
+            ],
+        },
+        {'row': 21, 'errors': ['last_name: Must not contain NUL characters.']},
+    ]}
+    assert db.execute(
+        select(func.count()).select_from(Student)
+    ).scalar() == 1998
+
+
+def test_csv_not_in_utf8_is_rejected(client, db):
+    create_reference_data(db)
+
+    response = client.post(URL, files={
+        'file': ('students.csv', b'\xff\xfe bad')
+    })
+
+    assert response.status_code == 400
+    assert response.json() == {
+        'detail': 'CSV upload must be encoded in UTF-8.'
+    }
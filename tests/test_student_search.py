@@ -0,0 +1,12 @@
+import pytest
+from app.core.config import settings
+
+URL = f'{settings.API_V1_STR}/students/search'
+
+
+@pytest.mark.parametrize('limit', [0, 101])
+def test_search_rejects_out_of_range_limits(client, limit):
+    response = client.get(URL, params={'q': 'احمد', 'limit': limit})
+
+    assert response.status_code == 422
+    assert response.json()['detail'][0]['loc'] == ['query', 'limit']
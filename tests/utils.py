@@ -0,0 +1,143 @@
+import csv
+import io
+from datetime import date, timedelta
+from itertools import cycle, islice
+from typing import Any, Dict, List
+from sqlalchemy import insert, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.core.arabic import FOLDED_LETTERS, REMOVED_MARKS
+from app.db.base import (
+    Base,
+    Grade,
+    Nationality,
+    Registration,
+    SchoolYear,
+    Student,
+)
+
+# app.core.arabic.normalize_arabic in SQL, as created by 9b1e4f7c2d60: the
+# generated students.name_block_key column needs it.
+NORMALIZE_ARABIC = f"""
+    CREATE FUNCTION normalize_arabic(value text) RETURNS text
+    LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE AS $$
+        SELECT btrim(regexp_replace(
+            translate(
+                lower(value),
+                '{''.join(FOLDED_LETTERS)}{REMOVED_MARKS}',
+                '{''.join(FOLDED_LETTERS.values())}'
+            ),
+            '\\s+', ' ', 'g'
+        ))
+    $$
+"""
+
+FIRST_NAMES = ['أحمد', 'فاطمة', 'محمد', 'مريم', 'يوسف', 'Sara', 'عليّ']
+LAST_NAMES = ['الحكيم', 'السعدي', 'موسى', 'Haddad', 'البنّاء']
+
+
+def reset_schema(connection: Connection) -> None:
+    """
+    Recreate the public schema of the database behind `connection` from the
+    models. Everything in it is dropped.
+    """
+    connection.execute(text('DROP SCHEMA public CASCADE'))
+    connection.execute(text('CREATE SCHEMA public'))
+    connection.execute(text(NORMALIZE_ARABIC))
+    Base.metadata.create_all(connection)
+
+
+def truncate_all(connection: Connection) -> None:
+    tables = ', '.join(table.name for table in Base.metadata.sorted_tables)
+    connection.execute(text(f'TRUNCATE {tables} RESTART IDENTITY CASCADE'))
+
+
+def create_reference_data(db: Session, grades: int = 3) -> Dict[str, Any]:
+    """
+    One nationality, `grades` grades numbered from 1 and an active school
+    year, committed.
+    """
+    nationality = Nationality(
+        masculine_form='يمني', feminine_form='يمنية', notes=None
+    )
+    school_year = SchoolYear(
+        title='2022-2023', start_date=date(2022, 9, 1),
+        end_date=date(2023, 6, 30), is_active=True
+    )
+    grade_rows = [
+        Grade(name=f'Grade {number}', numeric_value=number)
+        for number in range(1, grades + 1)
+    ]
+    db.add_all([nationality, school_year, *grade_rows])
+    db.commit()
+    return {
+        'nationality': nationality,
+        'school_year': school_year,
+        'grades': grade_rows,
+    }
+
+
+def student_rows(count: int, nationality_id: int) -> List[Dict[str, Any]]:
+    """
+    `count` valid students, with Arabic and Latin names and distinct phone
+    numbers.
+    """
+    names = islice(cycle(
+        (first, last) for first in FIRST_NAMES for last in LAST_NAMES
+    ), count)
+    return [
+        {
+            'first_name': first,
+            'father_name': 'عبد الله',
+            'gfather_name': 'صالح',
+            'last_name': last,
+            'gender': number % 2 == 0,
+            'date_of_birth': date(2010, 1, 1) + timedelta(days=number),
+            'guardian_phone_no': f'{700000000 + number}',
+            'nationality_id': nationality_id,
+        }
+        for number, (first, last) in enumerate(names)
+    ]
+
+
+def create_students(
+    db: Session, count: int, nationality_id: int
+) -> List[int]:
+    rows = student_rows(count, nationality_id)
+    ids = []
+    for start in range(0, count, 1000):
+        ids += db.execute(
+            insert(Student).values(rows[start:start + 1000])
+            .returning(Student.id)
+        ).scalars().all()
+    db.commit()
+    return sorted(ids)
+
+
+def register_students(
+    db: Session, student_ids: List[int], *, grade_id: int,
+    school_year_id: int
+) -> None:
+    if not student_ids:
+        return
+    db.execute(insert(Registration), [
+        {
+            'regi_no': f'T{school_year_id}-{student_id}',
+            'student_id': student_id,
+            'grade_id': grade_id,
+            'school_year_id': school_year_id,
+        }
+        for student_id in student_ids
+    ])
+    db.commit()
+
+
+def as_csv(rows: List[Dict[str, Any]]) -> bytes:
+    """
+    `rows` as a CSV upload, with the byte order mark spreadsheets write.
+    """
+    text = io.StringIO(newline='')
+    writer = csv.DictWriter(text, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return text.getvalue().encode('utf-8-sig')